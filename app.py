@@ -1,12 +1,26 @@
-from flask import Flask, render_template, request, redirect, session, send_file, jsonify
-from flask_mysqldb import MySQL
+from flask import Flask, render_template, request, redirect, session, send_file, jsonify, Response, stream_with_context, g
+import MySQLdb.cursors
 from werkzeug.security import check_password_hash
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from datetime import datetime
-from werkzeug.security import generate_password_hash
+from datetime import date, datetime, timedelta
+import csv
+import io
+import json
 import os
+from werkzeug.security import generate_password_hash
 import config
+from search_index import ProductSearchIndex, FIELDS as INDEX_FIELDS
+from invoicing import save_invoice, quantities, OutOfStock
+from pdf_cache import InvoicePdfCache
+from invoice_render import render_invoice
+from cart_store import CartStore, SqliteCartBackend
+from stock_ledger import apply_movements, save_purchase, ADJUST, stock_summary as ledger_stock_summary
+from reporting import daily_sales, gst_summary, monthly_profit, default_range
+from catalogue import read_rows, import_rows, export_csv
+from cache import LRUCache
+from invoice_store import InvoiceStore
+from db_pool import PooledMySQL, QueryMetrics
+from jobs import JobQueue
+from companies import PerCompany, list_companies, get_company, pdf_dir
 
 # -------------------------------------------------
 # APP CONFIG
@@ -21,8 +35,31 @@ app.config['MYSQL_HOST'] = config.MYSQL_HOST
 app.config['MYSQL_USER'] = config.MYSQL_USER
 app.config['MYSQL_PASSWORD'] = config.MYSQL_PASSWORD
 app.config['MYSQL_DB'] = config.MYSQL_DB
+app.config['MYSQL_POOL_SIZE'] = config.MYSQL_POOL_SIZE
+app.config['MYSQL_POOL_RECYCLE'] = config.MYSQL_POOL_RECYCLE
+app.config['MYSQL_POOL_PING_INTERVAL'] = config.MYSQL_POOL_PING_INTERVAL
+app.config['MYSQL_POOL_TIMEOUT'] = config.MYSQL_POOL_TIMEOUT
 
-mysql = MySQL(app)
+mysql = PooledMySQL(app)
+
+# -------------------------------------------------
+# QUERY INSTRUMENTATION
+# -------------------------------------------------
+# Every response that touched the database carries its query count, DB
+# time and slowest statement; /metrics aggregates them per endpoint.
+# Streamed responses (imports / exports) are counted up to the point the
+# stream starts.
+query_metrics = QueryMetrics()
+
+@app.after_request
+def db_stats_headers(response):
+    if 'db_stats' in g:
+        stats = g.db_stats
+        response.headers['X-DB-Queries'] = str(stats.count)
+        response.headers['X-DB-Time-Ms'] = f"{stats.seconds * 1000:.2f}"
+        response.headers['X-DB-Slowest-Ms'] = f"{stats.slowest[0] * 1000:.2f}"
+        query_metrics.record(request.endpoint or request.path, stats)
+    return response
 
 # -------------------------------------------------
 # HELPER: DB CONNECTION (DICT CURSOR)
@@ -32,25 +69,56 @@ def get_db():
     return conn
 
 # -------------------------------------------------
-# INVOICE NUMBER GENERATOR
+# PRODUCT SEARCH INDEX (IN-MEMORY)
 # -------------------------------------------------
-def generate_invoice_no():
-    year = datetime.now().year
+# one index per company, loaded with that company's products only
+product_indexes = PerCompany(lambda cid: ProductSearchIndex(ttl=config.SEARCH_INDEX_TTL))
+
+def get_product_index():
+    cid = company_id()
+    index = product_indexes.get(cid)
+
+    def fetch():
+        cur = mysql.connection.cursor()
+        cur.execute("""
+            SELECT id, part_no, barcode, part_name, sell_price, stock_qty
+            FROM products
+            WHERE company_id = %s
+        """, (cid,))
+        rows = cur.fetchall()
+        cur.close()
+        return rows
+
+    index.refresh(fetch)
+    return index
 
+def index_miss(where, params):
+    # A product another worker added since this worker's last index load
+    # is not in the index yet: read it by key and add it.
     cur = mysql.connection.cursor()
-    cur.execute("""
-        SELECT invoice_no
-        FROM invoices
-        WHERE invoice_no LIKE %s
-        ORDER BY id DESC
+    cur.execute(f"""
+        SELECT {", ".join(INDEX_FIELDS)}
+        FROM products
+        WHERE company_id = %s AND {where}
         LIMIT 1
-    """, (f"SV-{year}-%",))
-
-    last = cur.fetchone()
+    """, [company_id()] + params)
+    row = cur.fetchone()
     cur.close()
-
-    next_no = int(last[0].split('-')[-1]) + 1 if last else 1
-    return f"SV-{year}-{str(next_no).zfill(4)}"
+    if not row:
+        return None
+    index = product_indexes.get(company_id())
+    index.upsert(dict(zip(INDEX_FIELDS, row)))
+    return index.get(row[0])
+
+def find_product(product_id):
+    return get_product_index().get(product_id) or index_miss("id = %s", [product_id])
+
+def find_product_by_code(code):
+    # part_no or barcode
+    if not code:
+        return None
+    return (get_product_index().lookup(code)
+            or index_miss("(part_no = %s OR barcode = %s)", [code, code]))
 
 # -------------------------------------------------
 # LOGIN
@@ -70,7 +138,7 @@ def login():
 
         if user and check_password_hash(user[0], password):
             session['user'] = username
-            return redirect('/')
+            return redirect('/company-select')
         else:
             error = "Invalid username or password"
 
@@ -81,9 +149,70 @@ def login():
 # -------------------------------------------------
 @app.route('/logout')
 def logout():
+    if 'cart_id' in session:
+        carts.clear(session['cart_id'])
     session.clear()
     return redirect('/login')
 
+# -------------------------------------------------
+# COMPANY (SHOP) SELECTION
+# -------------------------------------------------
+# Everything after login works on session['company_id']; see companies.py.
+NO_COMPANY_NEEDED = {'login', 'logout', 'reset_password', 'static', 'metrics',
+                     'company_select', 'choose_company'}
+
+def load_company(cid):
+    cur = mysql.connection.cursor()
+    company = get_company(cur, cid)
+    cur.close()
+    return company
+
+company_rows = PerCompany(load_company)
+
+def company_id():
+    return session['company_id']
+
+def current_company():
+    return company_rows.get(company_id())
+
+@app.before_request
+def require_company():
+    if request.endpoint in NO_COMPANY_NEEDED or 'company_id' in session:
+        return None
+    if request.path.startswith('/api/') or request.endpoint == 'search_products':
+        return jsonify({}), 401
+    return redirect('/company-select' if 'user' in session else '/login')
+
+@app.context_processor
+def company_context():
+    return {"company": current_company() if 'company_id' in session else None}
+
+@app.route('/company-select')
+def company_select():
+    if 'user' not in session:
+        return redirect('/login')
+
+    cur = mysql.connection.cursor()
+    companies = list_companies(cur)
+    cur.close()
+
+    if len(companies) == 1 and 'company_id' not in session:
+        return choose_company(companies[0]['id'])
+    return render_template('company_select.html', companies=companies)
+
+@app.route('/company-select/<int:cid>')
+def choose_company(cid):
+    if 'user' not in session:
+        return redirect('/login')
+    if not company_rows.get(cid):
+        return "Company not found", 404
+
+    # a cart holds one company's products
+    if session.get('company_id') != cid and 'cart_id' in session:
+        carts.clear(session.pop('cart_id'))
+    session['company_id'] = cid
+    return redirect('/')
+
 # -------------------------------------------------
 # DASHBOARD
 # -------------------------------------------------
@@ -95,6 +224,53 @@ def dashboard():
 
 
 
+# -------------------------------------------------
+# PRODUCT LIST (KEYSET PAGES)
+# -------------------------------------------------
+PRODUCT_PAGE_SIZE = 50
+
+# first page per company and filter; any product or stock write in this
+# process clears that company's pages, and writes made by other workers
+# show up at most PRODUCT_PAGE_CACHE_TTL seconds later (absolute expiry:
+# reads do not extend it)
+product_page_caches = PerCompany(lambda cid: LRUCache(
+    maxsize=2, ttl=config.PRODUCT_PAGE_CACHE_TTL, refresh=False))
+
+def product_page(after=None, low_stock=False, limit=PRODUCT_PAGE_SIZE):
+    # after: (part_name, id) of the last row already shown
+    cid = company_id()
+    cache = product_page_caches.get(cid)
+    cacheable = after is None and limit == PRODUCT_PAGE_SIZE
+    if cacheable:
+        cached = cache.get(low_stock)
+        if cached is not None:
+            return cached
+
+    where, params = ["company_id = %s"], [cid]
+    if low_stock:
+        where.append("low_stock = 1")
+    if after:
+        where.append("(part_name, id) > (%s, %s)")
+        params += list(after)
+
+    cur = mysql.connection.cursor()
+    cur.execute(f"""
+        SELECT id, part_no, part_name, mrp, sell_price, stock_qty, min_stock
+        FROM products
+        WHERE {" AND ".join(where)}
+        ORDER BY part_name, id
+        LIMIT %s
+    """, params + [limit])
+    rows = cur.fetchall()
+    cur.close()
+
+    if cacheable:
+        cache.set(low_stock, rows)
+    return rows
+
+def products_changed(cid):
+    product_page_caches.get(cid).clear()
+
 # -------------------------------------------------
 # PRODUCTS
 # -------------------------------------------------
@@ -103,34 +279,116 @@ def products():
     if 'user' not in session:
         return redirect('/login')
 
-    cur = mysql.connection.cursor()
-
     if request.method == 'POST':
+        cur = mysql.connection.cursor()
         cur.execute("""
             INSERT INTO products
-            (part_no, barcode, part_name, mrp, sell_price, stock_qty, min_stock, gst_percent)
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
+            (company_id, part_no, barcode, part_name, mrp, sell_price, stock_qty, min_stock, gst_percent)
+            VALUES (%s,%s,%s,%s,%s,%s,0,%s,%s)
         """, (
+            company_id(),
             request.form['part_no'],
-            request.form.get('barcode'),
+            request.form.get('barcode') or None,
             request.form['part_name'],
             request.form['mrp'],
             request.form['sell_price'],
-            request.form['stock_qty'],
             request.form.get('min_stock', 0),
             request.form.get('gst_percent', 0)
         ))
+        product_id = cur.lastrowid
+
+        # opening stock goes through the ledger like any other movement
+        apply_movements(cur, ADJUST, {product_id: (int(request.form['stock_qty']), None)}, "OPENING")
         mysql.connection.commit()
+        cur.close()
 
-    cur.execute("""
-        SELECT id, part_no, part_name, mrp, sell_price, stock_qty, min_stock
-        FROM products
-        ORDER BY part_name
-    """)
-    products = cur.fetchall()
-    cur.close()
+        product_indexes.get(company_id()).upsert({
+            "id": product_id,
+            "part_no": request.form['part_no'],
+            "barcode": request.form.get('barcode') or None,
+            "part_name": request.form['part_name'],
+            "sell_price": request.form['sell_price'],
+            "stock_qty": request.form['stock_qty']
+        })
+        products_changed(company_id())
+        return redirect('/products')
+
+    low_stock = request.args.get('low_stock') == '1'
+    return render_template(
+        'products.html',
+        products=product_page(low_stock=low_stock),
+        low_stock=low_stock,
+        page_size=PRODUCT_PAGE_SIZE
+    )
 
-    return render_template('products.html', products=products)
+@app.route('/api/products')
+def api_products():
+    if 'user' not in session:
+        return jsonify({}), 401
+
+    after = None
+    if request.args.get('after_id'):
+        try:
+            after = (request.args.get('after_name', ''), int(request.args['after_id']))
+        except ValueError:
+            return jsonify({"error": "invalid cursor"}), 400
+    limit = max(1, min(request.args.get('limit', PRODUCT_PAGE_SIZE, type=int), 500))
+
+    rows = product_page(after, request.args.get('low_stock') == '1', limit)
+    return jsonify([{
+        "id": pid,
+        "part_no": part_no,
+        "part_name": name,
+        "mrp": float(mrp),
+        "sell_price": float(price),
+        "stock_qty": stock,
+        "min_stock": min_stock
+    } for pid, part_no, name, mrp, price, stock, min_stock in rows])
+
+# -------------------------------------------------
+# PRODUCT IMPORT / EXPORT (BULK)
+# -------------------------------------------------
+@app.route('/products/import', methods=['POST'])
+def products_import():
+    if 'user' not in session:
+        return redirect('/login')
+
+    f = request.files.get('file')
+    if not f or not f.filename:
+        return "No file uploaded", 400
+
+    # one JSON progress line per chunk, the last one has "done": true
+    cid = company_id()
+
+    def generate():
+        try:
+            for progress in import_rows(mysql.connection, cid, read_rows(f.stream, f.filename)):
+                yield json.dumps(progress) + "\n"
+        except ValueError as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+        finally:
+            product_indexes.get(cid).invalidate()
+            products_changed(cid)
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+@app.route('/products/export')
+def products_export():
+    if 'user' not in session:
+        return redirect('/login')
+
+    cur = mysql.connection.cursor(MySQLdb.cursors.SSCursor)
+    cid = company_id()
+
+    def generate():
+        try:
+            yield from export_csv(cur, cid)
+        finally:
+            cur.close()
+
+    return Response(stream_with_context(generate()), mimetype="text/csv", headers={
+        "Content-Disposition": "attachment; filename=products.csv"
+    })
 
 # -------------------------------------------------
 # SEARCH PRODUCTS (AJAX)
@@ -141,18 +399,25 @@ def search_products():
     if not q:
         return jsonify([])
 
-    cur = mysql.connection.cursor(dictionary=True)
-    cur.execute("""
-        SELECT id, part_no, part_name, sell_price, stock_qty
-        FROM products
-        WHERE part_no LIKE %s OR part_name LIKE %s
-        LIMIT 10
-    """, (f"%{q}%", f"%{q}%"))
+    return jsonify(get_product_index().search(q, limit=10))
 
-    rows = cur.fetchall()
-    cur.close()
+# -------------------------------------------------
+# BILLING CART (SERVER-SIDE)
+# -------------------------------------------------
+carts = CartStore(
+    maxsize=config.CART_MAX_CARTS,
+    ttl=config.CART_TTL,
+    backend=SqliteCartBackend(config.CART_DB) if config.CART_DB else None
+)
+
+def cart_id():
+    if 'cart_id' not in session:
+        session['cart_id'] = carts.new_id()
+    return session['cart_id']
 
-    return jsonify(rows)
+def lookup_product(product_id):
+    p = find_product(product_id)
+    return (p['part_name'], p['sell_price']) if p else None
 
 # -------------------------------------------------
 # BILLING PAGE
@@ -162,136 +427,154 @@ def billing():
     if 'user' not in session:
         return redirect('/login')
 
+    cart = carts.get(cart_id())
     return render_template(
         'billing.html',
-        bill_items=session.get('bill_items', []),
-        grand_total=session.get('grand_total', 0)
+        bill_items=cart.items(),
+        grand_total=round(cart.grand_total, 2)
     )
 
 
 # -------------------------------------------------
-# ADD ITEM TO BILL
+# ADD / UPDATE / REMOVE BILL ITEMS
 # -------------------------------------------------
 @app.route('/billing/add', methods=['POST'])
 def billing_add():
-    product_id = request.form['product_id']
-    qty = int(request.form['quantity'])
+    try:
+        product_id = int(request.form['product_id'])
+        qty = int(request.form['quantity'])
+    except (KeyError, ValueError):
+        return "Invalid product or quantity", 400
+    if qty < 1:
+        return "Quantity must be at least 1", 400
 
-    cur = mysql.connection.cursor(dictionary=True)
-    cur.execute("""
-        SELECT part_name, sell_price
-        FROM products WHERE id=%s
-    """, (product_id,))
-    p = cur.fetchone()
-
-    total = qty * float(p['sell_price'])
-
-    bill = session.get('bill_items', [])
-    bill.append({
-        "product_id": product_id,
-        "part_name": p['part_name'],
-        "qty": qty,
-        "price": float(p['sell_price']),
-        "total": total
-    })
+    if not carts.add(cart_id(), product_id, qty, lookup_product):
+        return "Product not found", 404
 
-    session['bill_items'] = bill
-    session['grand_total'] = session.get('grand_total', 0) + total
-    cur.close()
+    return redirect('/billing')
+
+@app.route('/billing/update', methods=['POST'])
+def billing_update():
+    # quantity 0 removes the line
+    try:
+        product_id = int(request.form['product_id'])
+        qty = int(request.form['quantity'])
+    except (KeyError, ValueError):
+        return "Invalid product or quantity", 400
+    if qty < 0:
+        return "Quantity cannot be negative", 400
+
+    carts.update(cart_id(), product_id, qty)
+    return redirect('/billing')
 
+@app.route('/billing/remove', methods=['POST'])
+def billing_remove():
+    try:
+        product_id = int(request.form['product_id'])
+    except (KeyError, ValueError):
+        return "Invalid product", 400
+
+    carts.remove(cart_id(), product_id)
     return redirect('/billing')
 
+# -------------------------------------------------
+# BARCODE SCAN -> CART (JSON)
+# -------------------------------------------------
+# One round trip per scan: the code is resolved from the in-memory index
+# (part_no / barcode maps, kept current on product writes) and only the
+# changed line comes back, so the page is not re-rendered. No DB query
+# unless the index is due for a reload or the code is not in it yet.
+@app.route('/api/scan', methods=['POST'])
+def api_scan():
+    if 'user' not in session:
+        return jsonify({}), 401
+
+    data = request.get_json(silent=True) or {}
+    code = str(data.get('code') or '').strip()
+    try:
+        qty = int(data.get('qty', 1))
+    except (TypeError, ValueError):
+        qty = 0
+    if not code or qty < 1:
+        return jsonify({"error": "code and a positive qty required"}), 400
+
+    product = find_product_by_code(code)
+    if not product:
+        return jsonify({"error": "not found", "code": code}), 404
+
+    cid = cart_id()
+    line = carts.add(cid, product['id'], qty,
+                     lambda pid: (product['part_name'], product['sell_price']))
+    return jsonify({
+        "line": dict(line, part_no=product['part_no']),
+        "stock": product['stock_qty'],
+        "grand_total": round(carts.get(cid).grand_total, 2)
+    })
+
 # -------------------------------------------------
 # FINALIZE BILL
 # -------------------------------------------------
 @app.route('/finalize', methods=['POST'])
 def finalize_bill():
-    if 'user' not in session or not session.get('bill_items'):
+    if 'user' not in session:
         return redirect('/billing')
 
-    invoice_no = generate_invoice_no()
-    total_amount = session['grand_total']
-
-    cur = mysql.connection.cursor()
-    cur.execute("""
-        INSERT INTO invoices (invoice_no, total_amount, created_at)
-        VALUES (%s,%s,%s)
-    """, (invoice_no, total_amount, datetime.now()))
-
-    invoice_id = cur.lastrowid
-
-    for i in session['bill_items']:
-        cur.execute("""
-            INSERT INTO invoice_items
-            (invoice_id, product_id, quantity, price, total)
-            VALUES (%s,%s,%s,%s,%s)
-        """, (invoice_id, i['product_id'], i['qty'], i['price'], i['total']))
+    cart = carts.get(cart_id())
+    items = cart.items()
+    if not items:
+        return redirect('/billing')
 
-        cur.execute("""
-            UPDATE products
-            SET stock_qty = stock_qty - %s
-            WHERE id=%s
-        """, (i['qty'], i['product_id']))
+    try:
+        invoice_id, invoice_no = save_invoice(mysql.connection, current_company(), items)
+    except (OutOfStock, ValueError) as e:
+        return render_template(
+            'billing.html',
+            bill_items=items,
+            grand_total=round(cart.grand_total, 2),
+            error=str(e)
+        ), 409 if isinstance(e, OutOfStock) else 400
 
-    mysql.connection.commit()
-    cur.close()
+    index = product_indexes.get(company_id())
+    for pid, qty in quantities(items).items():
+        index.adjust_stock(pid, -qty)
+    products_changed(company_id())
 
-    session.pop('bill_items')
-    session.pop('grand_total')
+    carts.clear(cart_id())
+    pdf_caches.get(company_id()).prerender(invoice_no)
 
     return redirect(f"/invoice/{invoice_no}")
 
 # -------------------------------------------------
 # INVOICE PDF
 # -------------------------------------------------
-@app.route('/invoice/<invoice_no>')
-def invoice_pdf(invoice_no):
-    if 'user' not in session:
-        return redirect('/login')
-
-    cur = mysql.connection.cursor()
-    cur.execute("""
-        SELECT id, total_amount, created_at
-        FROM invoices WHERE invoice_no=%s
-    """, (invoice_no,))
-    invoice = cur.fetchone()
-    invoice_id = invoice[0]
-
-    cur.execute("""
-        SELECT p.part_no, p.part_name, ii.quantity, ii.price, ii.total
-        FROM invoice_items ii
-        JOIN products p ON ii.product_id = p.id
-        WHERE ii.invoice_id=%s
-    """, (invoice_id,))
-    items = cur.fetchall()
-    cur.close()
-
-    os.makedirs("invoices", exist_ok=True)
-    path = f"invoices/{invoice_no}.pdf"
+invoice_stores = PerCompany(lambda cid: InvoiceStore(cid, maxsize=config.INVOICE_CACHE_SIZE))
 
-    c = canvas.Canvas(path, pagesize=A4)
-    width, height = A4
+def render_invoice_pdf(cid, invoice_no):
+    with app.app_context():
+        invoice = invoice_stores.get(cid).get(mysql.connection, invoice_no)
+        shop_name = company_rows.get(cid)['name']
+    if not invoice:
+        return None
 
-    c.setFont("Helvetica-Bold", 16)
-    c.drawCentredString(width/2, height-40, "SRI VINAYAGA AUTO PARTS")
+    rows = ((i['part_no'], i['name'], i['qty'], i['rate'], i['amount']) for i in invoice['items'])
+    return render_invoice(invoice_no, invoice['created_at'], invoice['total'], rows, shop_name)
 
-    c.setFont("Helvetica", 10)
-    c.drawString(40, height-80, f"Invoice No : {invoice_no}")
-    c.drawString(40, height-95, f"Date : {invoice[2].strftime('%d-%m-%Y')}")
+# one PDF directory (and render pool) per company, see companies.pdf_dir
+pdf_caches = PerCompany(lambda cid: InvoicePdfCache(
+    pdf_dir(cid), lambda invoice_no: render_invoice_pdf(cid, invoice_no),
+    workers=config.INVOICE_PDF_WORKERS))
 
-    y = height-140
-    for part_no, name, qty, rate, total in items:
-        c.drawString(40, y, part_no)
-        c.drawString(120, y, name)
-        c.drawRightString(380, y, str(qty))
-        c.drawRightString(450, y, f"{rate:.2f}")
-        c.drawRightString(550, y, f"{total:.2f}")
-        y -= 18
+@app.route('/invoice/<invoice_no>')
+def invoice_pdf(invoice_no):
+    if 'user' not in session:
+        return redirect('/login')
 
-    c.drawRightString(550, y-20, f"Total ₹ {invoice[1]:.2f}")
-    c.save()
+    path, etag = pdf_caches.get(company_id()).get(invoice_no)
+    if not path:
+        return "Invoice not found", 404
 
-    return send_file(path, mimetype="application/pdf")
+    # conditional=True answers If-None-Match with a 304
+    return send_file(path, mimetype="application/pdf", etag=etag, conditional=True)
 #--------------------------------------------------
 #api/products
 #--------------------------------------------------
@@ -299,17 +582,7 @@ def invoice_pdf(invoice_no):
 def api_product():
     q = request.args.get('query')
 
-    cur = mysql.connection.cursor(dictionary=True)
-    cur.execute("""
-        SELECT id, part_no, part_name, sell_price, stock_qty
-        FROM products
-        WHERE part_no = %s OR barcode = %s
-        LIMIT 1
-    """, (q, q))
-
-    product = cur.fetchone()
-    cur.close()
-
+    product = find_product_by_code((q or '').strip())
     if not product:
         return jsonify({}), 404
 
@@ -326,62 +599,207 @@ def api_product():
 def sales_display():
     return render_template('sales_display.html')
 
-@app.route('/purchase-create')
+# -------------------------------------------------
+# PURCHASE ENTRY
+# -------------------------------------------------
+PURCHASE_ROWS = 10
+
+@app.route('/purchase-create', methods=['GET', 'POST'])
 def purchase_create():
-    return render_template('purchase_create.html')
+    if 'user' not in session:
+        return redirect('/login')
 
+    error = None
+
+    if request.method == 'POST':
+        items = []
+        index = get_product_index()
+        rows = zip(request.form.getlist('part_no'),
+                   request.form.getlist('qty'),
+                   request.form.getlist('rate'))
+        for part_no, qty, rate in rows:
+            if not part_no.strip():
+                continue
+            product = find_product_by_code(part_no.strip())
+            if not product:
+                error = f"Unknown part no {part_no}"
+                break
+            try:
+                qty, rate = int(qty), float(rate)
+            except ValueError:
+                error = f"Invalid qty/rate for {part_no}"
+                break
+            if qty < 1 or not 0 <= rate < float('inf'):
+                error = f"Qty must be at least 1 and rate 0 or more for {part_no}"
+                break
+            items.append({"product_id": product['id'], "qty": qty, "rate": rate})
+
+        if not error and items:
+            save_purchase(mysql.connection, company_id(), request.form.get('supplier'),
+                          request.form.get('invoice_no'), items)
+            for i in items:
+                index.adjust_stock(i['product_id'], i['qty'])
+            products_changed(company_id())
+            return redirect('/stock-summary')
+
+    return render_template('purchase_create.html', rows=PURCHASE_ROWS, error=error)
+
+# -------------------------------------------------
+# STOCK SUMMARY
+# -------------------------------------------------
 @app.route('/stock-summary')
 def stock_summary():
-    return render_template('stock_summary.html')
+    if 'user' not in session:
+        return redirect('/login')
+
+    cur = mysql.connection.cursor()
+    rows = ledger_stock_summary(cur, company_id())
+    cur.close()
+
+    products = [
+        {"part_no": part_no, "part_name": name, "stock_qty": stock,
+         "min_stock": min_stock, "avg_cost": avg_cost}
+        for part_no, name, stock, min_stock, avg_cost in rows
+    ]
+    reorder = [p for p in products if p['stock_qty'] <= p['min_stock']]
+
+    return render_template('stock_summary.html', products=products, reorder=reorder)
 
 @app.route('/voucher')
 def voucher():
     return render_template('voucher.html')
+
+# -------------------------------------------------
+# END-OF-DAY JOBS (PROCESS POOL)
+# -------------------------------------------------
+job_queue = JobQueue(workers=config.JOB_WORKERS)
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    # {"kind": "invoice_pdfs" | "gst_summary" | "reorder_list" | "voucher_export",
+    #  "params": {"date": "YYYY-MM-DD"} or {"from": ..., "to": ...}}
+    if 'user' not in session:
+        return jsonify({}), 401
+
+    data = request.get_json(silent=True)
+    if data is None:
+        # plain form post: every field except kind is a param
+        data = {"kind": request.form.get('kind'),
+                "params": {k: v for k, v in request.form.items() if k != 'kind' and v}}
+    params = data.get('params') if isinstance(data.get('params'), dict) else {}
+    try:
+        job_id = job_queue.submit(mysql.connection, company_id(), data.get('kind'), params)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({"id": job_id, "status_url": f"/jobs/{job_id}"}), 202
+
+@app.route('/jobs/<int:job_id>')
+def job_status(job_id):
+    if 'user' not in session:
+        return jsonify({}), 401
+
+    job = JobQueue.get(mysql.connection, company_id(), job_id)
+    if not job:
+        return jsonify({}), 404
+    return jsonify(job)
+
+@app.route('/jobs/<int:job_id>/file')
+def job_file(job_id):
+    if 'user' not in session:
+        return redirect('/login')
+
+    job = JobQueue.get(mysql.connection, company_id(), job_id)
+    if not job or job['status'] != 'done' or not (job['result'] or {}).get('file'):
+        return "No output for this job", 404
+    return send_file(os.path.abspath(os.path.join(config.JOB_OUTPUT_DIR, job['result']['file'])),
+                     mimetype="text/csv", as_attachment=True)
+
+# -------------------------------------------------
+# REPORTS (FROM ROLLUPS)
+# -------------------------------------------------
+def report_range(args):
+    start, end = default_range()
+    if args.get('from'):
+        start = datetime.strptime(args['from'], '%Y-%m-%d').date()
+    if args.get('to'):
+        end = datetime.strptime(args['to'], '%Y-%m-%d').date()
+    return start, end
+
 @app.route('/reports')
 def reports():
     if 'user' not in session:
         return redirect('/login')
-    return render_template('reports.html')
+
+    try:
+        start, end = report_range(request.args)
+    except ValueError:
+        return "Invalid date", 400
+
+    cur = mysql.connection.cursor()
+    daily = daily_sales(cur, company_id(), start, end)
+    gst = gst_summary(cur, company_id(), start, end)
+    cur.close()
+
+    return render_template('reports.html', daily=daily, gst=gst, start=start, end=end)
+
 @app.route('/profit-report')
 def profit_report():
     if 'user' not in session:
         return redirect('/login')
-    return render_template('profit_report.html')
+
+    try:
+        month = datetime.strptime(request.args['month'], '%Y-%m').date() \
+            if request.args.get('month') else date.today()
+    except ValueError:
+        return "Invalid month", 400
+
+    cur = mysql.connection.cursor()
+    report = monthly_profit(cur, company_id(), month)
+    cur.close()
+
+    return render_template('profit_report.html', report=report, month=month.strftime('%Y-%m'))
+
+# -------------------------------------------------
+# INVOICE PRINT (HTML)
+# -------------------------------------------------
 @app.route('/invoice-print/<invoice_no>')
 def invoice_print(invoice_no):
     if 'user' not in session:
         return redirect('/login')
 
-    cur = mysql.connection.cursor(dictionary=True)
-
-    cur.execute("""
-        SELECT invoice_no, total_amount, created_at
-        FROM invoices
-        WHERE invoice_no = %s
-    """, (invoice_no,))
-    invoice = cur.fetchone()
-
+    invoice = invoice_stores.get(company_id()).get(mysql.connection, invoice_no)
     if not invoice:
-        cur.close()
         return "Invoice not found", 404
 
-    cur.execute("""
-        SELECT p.part_name, ii.quantity, ii.price, ii.total
-        FROM invoice_items ii
-        JOIN products p ON ii.product_id = p.id
-        WHERE ii.invoice_id = (
-            SELECT id FROM invoices WHERE invoice_no = %s
-        )
-    """, (invoice_no,))
-    items = cur.fetchall()
+    return render_template('invoice_print.html', invoices=[invoice],
+                           shop_name=current_company()['name'])
+
+@app.route('/invoice-print-day')
+def invoice_print_day():
+    if 'user' not in session:
+        return redirect('/login')
 
+    try:
+        day = datetime.strptime(request.args['date'], '%Y-%m-%d') \
+            if request.args.get('date') else datetime.combine(date.today(), datetime.min.time())
+    except ValueError:
+        return "Invalid date", 400
+
+    cur = mysql.connection.cursor()
+    cur.execute("""
+        SELECT invoice_no
+        FROM invoices
+        WHERE company_id = %s AND created_at >= %s AND created_at < %s
+        ORDER BY created_at, id
+    """, (company_id(), day, day + timedelta(days=1)))
+    invoice_nos = [row[0] for row in cur.fetchall()]
     cur.close()
 
-    return render_template(
-        'invoice_print.html',
-        invoice=invoice,
-        items=items
-    )
+    # every invoice of the day in one batched query (minus cached ones)
+    found = invoice_stores.get(company_id()).get_many(mysql.connection, invoice_nos)
+    return render_template('invoice_print.html', invoices=[found[no] for no in invoice_nos if no in found],
+                           shop_name=current_company()['name'])
 
 
 #---------------------------------------------------
@@ -410,21 +828,140 @@ def reset_password():
 # -------------------------------------------------
 # INVOICE LIST (SALES PRINT)
 # -------------------------------------------------
+INVOICE_PAGE_SIZE = 50
+
+def amount_filter(value):
+    # nan / inf would reach MySQL as bare tokens and fail as SQL
+    amount = float(value)
+    if not abs(amount) < float('inf'):
+        raise ValueError(f"not a finite amount: {value}")
+    return amount
+
+def invoice_filters(args):
+    # the company's invoices, narrowed by date range (inclusive,
+    # YYYY-MM-DD) and amount range from the query string
+    where, params = ["company_id = %s"], [company_id()]
+    if args.get('from'):
+        where.append("created_at >= %s")
+        params.append(datetime.strptime(args['from'], '%Y-%m-%d'))
+    if args.get('to'):
+        where.append("created_at < %s")
+        params.append(datetime.strptime(args['to'], '%Y-%m-%d') + timedelta(days=1))
+    if args.get('min'):
+        where.append("total_amount >= %s")
+        params.append(amount_filter(args['min']))
+    if args.get('max'):
+        where.append("total_amount <= %s")
+        params.append(amount_filter(args['max']))
+    return where, params
+
+def export_invoices(where, params, fmt):
+    # server-side cursor: rows go out as they are read, memory stays flat
+    # however many invoices match
+    cur = mysql.connection.cursor(MySQLdb.cursors.SSCursor)
+    cur.execute(f"""
+        SELECT invoice_no, total_amount, created_at
+        FROM invoices
+        WHERE {" AND ".join(where)}
+        ORDER BY created_at DESC, id DESC
+    """, params)
+
+    def generate():
+        try:
+            if fmt == 'json':
+                yield "["
+            first = True
+            while True:
+                rows = cur.fetchmany(1000)
+                if not rows:
+                    break
+                if fmt == 'json':
+                    chunk = ",".join(json.dumps({
+                        "invoice_no": no,
+                        "total_amount": float(total),
+                        "created_at": created.isoformat()
+                    }) for no, total, created in rows)
+                    yield chunk if first else "," + chunk
+                else:
+                    buf = io.StringIO()
+                    writer = csv.writer(buf)
+                    if first:
+                        writer.writerow(["invoice_no", "total_amount", "created_at"])
+                    writer.writerows(
+                        (no, f"{total:.2f}", created.strftime('%Y-%m-%d %H:%M:%S'))
+                        for no, total, created in rows
+                    )
+                    yield buf.getvalue()
+                first = False
+            if fmt == 'json':
+                yield "]"
+        finally:
+            cur.close()
+
+    mimetype = "application/json" if fmt == 'json' else "text/csv"
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers={
+        "Content-Disposition": f"attachment; filename=invoices.{fmt}"
+    })
+
 @app.route('/invoice-list')
 def invoice_list():
     if 'user' not in session:
         return redirect('/login')
 
+    try:
+        where, params = invoice_filters(request.args)
+    except ValueError:
+        return "Invalid filter", 400
+
+    fmt = request.args.get('format')
+    if fmt in ('csv', 'json'):
+        return export_invoices(where, params, fmt)
+
+    # keyset pagination: "after" is the (created_at, id) of the last row
+    # shown, so each page is an index range scan on (created_at, id)
+    after = request.args.get('after')
+    if after:
+        try:
+            created, last_id = after.rsplit('_', 1)
+            where.append("(created_at, id) < (%s, %s)")
+            params += [datetime.fromisoformat(created), int(last_id)]
+        except ValueError:
+            return "Invalid page", 400
+
     cur = mysql.connection.cursor()
-    cur.execute("""
-        SELECT invoice_no, total_amount, created_at
+    cur.execute(f"""
+        SELECT invoice_no, total_amount, created_at, id
         FROM invoices
-        ORDER BY created_at DESC
-    """)
+        WHERE {" AND ".join(where)}
+        ORDER BY created_at DESC, id DESC
+        LIMIT %s
+    """, params + [INVOICE_PAGE_SIZE + 1])
     invoices = cur.fetchall()
     cur.close()
 
-    return render_template('invoice_list.html', invoices=invoices)
+    next_after = None
+    if len(invoices) > INVOICE_PAGE_SIZE:
+        invoices = invoices[:INVOICE_PAGE_SIZE]
+        last = invoices[-1]
+        next_after = f"{last[2].isoformat()}_{last[3]}"
+
+    filters = {k: v for k, v in request.args.items() if k in ('from', 'to', 'min', 'max') and v}
+
+    return render_template(
+        'invoice_list.html',
+        invoices=invoices,
+        filters=filters,
+        next_after=next_after
+    )
+
+# -------------------------------------------------
+# METRICS
+# -------------------------------------------------
+@app.route('/metrics')
+def metrics():
+    if 'user' not in session:
+        return jsonify({}), 401
+    return jsonify(query_metrics.snapshot())
 
 # -------------------------------------------------
 # RUN
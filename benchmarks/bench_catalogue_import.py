@@ -0,0 +1,80 @@
+"""Price-list import: one INSERT + commit per row (the /products form) vs
+the chunked upsert in catalogue.py. Targets: 20k+ rows/s, peak Python
+memory under 20 MiB for a 40k-row file.
+
+Needs a MySQL server (credentials from config.py); runs in a scratch DB.
+
+    python benchmarks/bench_catalogue_import.py --rows 40000
+"""
+import argparse
+import csv
+import io
+import time
+import tracemalloc
+
+from db import COMPANY, create_scratch_db
+from synthetic import products
+
+from catalogue import read_rows, import_rows
+
+
+def price_list(n):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["part_no", "barcode", "part_name", "mrp", "sell_price", "min_stock", "gst_percent"])
+    for _, part_no, barcode, name, price, _ in products(n):
+        writer.writerow([part_no, barcode, name, round(price * 1.1, 2), price, 5, 18])
+    return buf.getvalue().encode()
+
+
+def per_row(conn, data):
+    cur = conn.cursor()
+    for row in read_rows(io.BytesIO(data), 'list.csv'):
+        cur.execute("""
+            INSERT INTO products
+            (company_id, part_no, barcode, part_name, mrp, sell_price, stock_qty, min_stock, gst_percent)
+            VALUES (%s,%s,%s,%s,%s,%s,0,%s,%s)
+        """, (COMPANY['id'], row['part_no'], row['barcode'], row['part_name'], row['mrp'],
+              row['sell_price'], row['min_stock'], row['gst_percent']))
+        conn.commit()
+    cur.close()
+
+
+def chunked(conn, data):
+    for progress in import_rows(conn, COMPANY['id'], read_rows(io.BytesIO(data), 'list.csv')):
+        pass
+    return progress
+
+
+def run(label, fn, db, data, rows):
+    conn = create_scratch_db(db)
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(conn, data)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} {rows / elapsed:9.0f} rows/s   {elapsed:6.1f} s   peak {peak / 2**20:5.1f} MiB")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--db', default='bike_billing_bench')
+    ap.add_argument('--rows', type=int, default=40000)
+    args = ap.parse_args()
+
+    data = price_list(args.rows)
+    print(f"price list: {args.rows} rows, {len(data) / 2**20:.1f} MiB")
+    run("per row (form path)", per_row, args.db, data, args.rows)
+    run("chunked upsert", chunked, args.db, data, args.rows)
+
+    # second pass over a loaded catalogue: every row is an update
+    conn = create_scratch_db(args.db)
+    chunked(conn, data)
+    start = time.perf_counter()
+    chunked(conn, data)
+    print(f"{'chunked re-import':<22} {args.rows / (time.perf_counter() - start):9.0f} rows/s")
+
+
+if __name__ == '__main__':
+    main()
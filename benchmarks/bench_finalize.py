@@ -0,0 +1,166 @@
+"""Finalize throughput: per-line round trips vs the single-transaction path.
+
+Needs a MySQL server (credentials from config.py). Works in a scratch
+database that is dropped and recreated on every run.
+
+    python benchmarks/bench_finalize.py --bills 200 --lines 100 --workers 8
+"""
+import argparse
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import MySQLdb
+
+from db import COMPANY, connect, create_scratch_db, seed_products
+from synthetic import products, percentile
+
+from invoicing import save_invoice, OutOfStock
+
+
+class CountingCursor:
+    # counts statements sent to the server
+    def __init__(self, cur, counter):
+        self._cur = cur
+        self._counter = counter
+
+    def execute(self, *args):
+        self._counter[0] += 1
+        return self._cur.execute(*args)
+
+    def executemany(self, *args):
+        self._counter[0] += 1
+        return self._cur.executemany(*args)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+
+class CountingConnection:
+    def __init__(self, conn):
+        self._conn = conn
+        self.round_trips = [0]
+
+    def cursor(self):
+        return CountingCursor(self._conn.cursor(), self.round_trips)
+
+    def commit(self):
+        self.round_trips[0] += 1
+        self._conn.commit()
+
+    def rollback(self):
+        self.round_trips[0] += 1
+        self._conn.rollback()
+
+
+def legacy_save_invoice(conn, items):
+    # finalize_bill before batching: two statements per line, no locking
+    invoice_no = f"LEGACY-{next(legacy_numbers)}"
+    cur = conn.cursor()
+    cur.execute("""
+        INSERT INTO invoices (company_id, invoice_no, total_amount, created_at)
+        VALUES (%s,%s,%s,%s)
+    """, (COMPANY['id'], invoice_no, sum(i['total'] for i in items), datetime.now()))
+    invoice_id = cur.lastrowid
+    for i in items:
+        cur.execute("""
+            INSERT INTO invoice_items
+            (invoice_id, product_id, quantity, price, total)
+            VALUES (%s,%s,%s,%s,%s)
+        """, (invoice_id, i['product_id'], i['qty'], i['price'], i['total']))
+        cur.execute("""
+            UPDATE products
+            SET stock_qty = stock_qty - %s
+            WHERE id=%s
+        """, (i['qty'], i['product_id']))
+    conn.commit()
+    cur.close()
+
+
+legacy_numbers = itertools.count(1)
+
+
+def make_bill(rnd, catalogue, lines):
+    items = []
+    for row in rnd.sample(catalogue, lines):
+        qty = rnd.randint(1, 3)
+        items.append({"product_id": row[0], "qty": qty,
+                      "price": row[4], "total": round(qty * row[4], 2)})
+    return items
+
+
+def run(label, save, db, catalogue, args):
+    local = threading.local()
+    latencies, trips, errors = [], [], []
+
+    def one(n):
+        if not hasattr(local, 'conn'):
+            local.conn = CountingConnection(connect(db))
+        items = make_bill(random.Random(n), catalogue, args.lines)
+        before = local.conn.round_trips[0]
+        start = time.perf_counter()
+        try:
+            save(local.conn, items)
+        except MySQLdb.OperationalError as e:
+            # the unlocked legacy path deadlocks under concurrency
+            errors.append(e)
+            local.conn.rollback()
+            return
+        latencies.append((time.perf_counter() - start) * 1000)
+        trips.append(local.conn.round_trips[0] - before)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.workers) as pool:
+        list(pool.map(one, range(args.bills)))
+    elapsed = time.perf_counter() - start
+
+    print(f"{label:<8} {args.bills / elapsed:7.1f} bills/s   "
+          f"p50 {percentile(latencies, 50):7.1f} ms   p99 {percentile(latencies, 99):7.1f} ms   "
+          f"{sum(trips) / len(trips):6.1f} round trips/bill   {len(errors)} failed")
+
+
+def oversell_check(db, workers):
+    # `workers` terminals race for a part with 5 left; only 5 may win
+    conn = connect(db)
+    cur = conn.cursor()
+    cur.execute("UPDATE products SET stock_qty = 5 WHERE id = 1")
+    conn.commit()
+
+    sold = []
+
+    def one(n):
+        try:
+            save_invoice(connect(db), COMPANY, [{"product_id": 1, "qty": 1, "price": 1, "total": 1}])
+            sold.append(n)
+        except OutOfStock:
+            pass
+
+    with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(one, range(workers * 2)))
+
+    cur.execute("SELECT stock_qty FROM products WHERE id = 1")
+    print(f"oversell check: {len(sold)} sold, stock left {cur.fetchone()[0]} (expect 5 sold, 0 left)")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--db', default='bike_billing_bench')
+    ap.add_argument('--products', type=int, default=5000)
+    ap.add_argument('--bills', type=int, default=200)
+    ap.add_argument('--lines', type=int, default=100)
+    ap.add_argument('--workers', type=int, default=8)
+    args = ap.parse_args()
+
+    catalogue = [r[:5] + (10 ** 6,) for r in products(args.products)]
+    seed_products(create_scratch_db(args.db), catalogue)
+
+    run("legacy", legacy_save_invoice, args.db, catalogue, args)
+    run("batched", lambda conn, items: save_invoice(conn, COMPANY, items), args.db, catalogue, args)
+    oversell_check(args.db, args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Invoice PDF render time and peak memory for large bills.
+
+    python benchmarks/bench_invoice_render.py --lines 1000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from invoice_render import render_invoice  # noqa: E402
+from synthetic import products  # noqa: E402
+
+
+def rows(catalogue, n):
+    # generator, like rows coming off a server-side cursor
+    for i in range(n):
+        _, part_no, _, name, price, _ = catalogue[i % len(catalogue)]
+        qty = i % 5 + 1
+        yield part_no, name, qty, price, round(qty * price, 2)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--lines', type=int, nargs='+', default=[10, 100, 1000, 5000])
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+
+    catalogue = products(5000)
+    for n in args.lines:
+        total = sum(r[4] for r in rows(catalogue, n))
+
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            pdf = render_invoice("SV-2026-0001", datetime(2026, 1, 1), total, rows(catalogue, n))
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        tracemalloc.start()
+        render_invoice("SV-2026-0001", datetime(2026, 1, 1), total, rows(catalogue, n))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"{n:6d} lines  {pdf.count(b'/Type /Page') - pdf.count(b'/Type /Pages'):4d} pages  "
+              f"{best * 1000:8.1f} ms  peak {peak / 2**20:6.1f} MiB  pdf {len(pdf) / 1024:7.1f} KiB")
+
+
+if __name__ == '__main__':
+    main()
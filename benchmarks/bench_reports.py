@@ -0,0 +1,118 @@
+"""Report latency from rollups vs GROUP BY over invoices, plus backfill time.
+
+Needs a MySQL server (credentials from config.py); runs in a scratch DB.
+
+    python benchmarks/bench_reports.py --lines 3000000 --days 730
+"""
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from db import COMPANY, create_scratch_db, seed_products
+from synthetic import products
+
+from reporting import backfill, daily_sales, gst_summary, monthly_profit
+
+ADHOC_DAILY_SQL = """
+    SELECT DATE(i.created_at), SUM(ii.total)
+    FROM invoices i
+    JOIN invoice_items ii ON ii.invoice_id = i.id
+    WHERE i.company_id = 1 AND i.created_at >= %s AND i.created_at < %s
+    GROUP BY DATE(i.created_at)
+"""
+
+ADHOC_PROFIT_SQL = """
+    SELECT p.part_name, SUM(ii.quantity), SUM(ii.total)
+    FROM invoices i
+    JOIN invoice_items ii ON ii.invoice_id = i.id
+    JOIN products p ON p.id = ii.product_id
+    WHERE i.company_id = 1 AND i.created_at >= %s AND i.created_at < %s
+    GROUP BY ii.product_id, p.part_name
+"""
+
+
+def seed_sales(conn, catalogue, lines, days, lines_per_bill=10, chunk=50000):
+    rnd = random.Random(3)
+    first = datetime.combine(date.today() - timedelta(days=days), datetime.min.time())
+    step = days * 86400 / (lines / lines_per_bill)
+    cur = conn.cursor()
+    invoice_id = 0
+    items = []
+    for n in range(lines // lines_per_bill):
+        invoice_id += 1
+        created = first + timedelta(seconds=n * step)
+        bill = []
+        for row in rnd.sample(catalogue, lines_per_bill):
+            qty = rnd.randint(1, 3)
+            bill.append((invoice_id, row[0], qty, row[4], round(qty * row[4], 2)))
+        cur.execute("""
+            INSERT INTO invoices (id, company_id, invoice_no, total_amount, created_at)
+            VALUES (%s,%s,%s,%s,%s)
+        """, (invoice_id, COMPANY['id'], f"SV-{invoice_id}", sum(b[4] for b in bill), created))
+        items += bill
+        if len(items) >= chunk:
+            cur.executemany("""
+                INSERT INTO invoice_items (invoice_id, product_id, quantity, price, total)
+                VALUES (%s,%s,%s,%s,%s)
+            """, items)
+            conn.commit()
+            items = []
+    if items:
+        cur.executemany("""
+            INSERT INTO invoice_items (invoice_id, product_id, quantity, price, total)
+            VALUES (%s,%s,%s,%s,%s)
+        """, items)
+    conn.commit()
+    cur.close()
+    return first.date()
+
+
+def timed(label, fn, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<40} best {min(samples):9.1f} ms   worst {max(samples):9.1f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--db', default='bike_billing_bench')
+    ap.add_argument('--products', type=int, default=20000)
+    ap.add_argument('--lines', type=int, default=3000000)
+    ap.add_argument('--days', type=int, default=730)
+    args = ap.parse_args()
+
+    conn = create_scratch_db(args.db)
+    catalogue = products(args.products)
+    seed_products(conn, catalogue)
+
+    start = time.perf_counter()
+    first = seed_sales(conn, catalogue, args.lines, args.days)
+    print(f"seeded {args.lines} invoice lines in {time.perf_counter() - start:.1f} s")
+
+    start = time.perf_counter()
+    backfill(conn, first, date.today())
+    print(f"backfill {args.days} days: {time.perf_counter() - start:.1f} s")
+
+    cur = conn.cursor()
+    end = date.today()
+    month_start = end.replace(day=1)
+    range_start = end - timedelta(days=29)
+
+    cid = COMPANY['id']
+    timed("/reports daily (rollup)", lambda: daily_sales(cur, cid, range_start, end))
+    timed("/reports gst (rollup)", lambda: gst_summary(cur, cid, range_start, end))
+    timed("/profit-report (rollup)", lambda: monthly_profit(cur, cid, end))
+
+    def adhoc(sql, lo):
+        cur.execute(sql, (lo, end + timedelta(days=1)))
+        cur.fetchall()
+    timed("daily via invoices GROUP BY", lambda: adhoc(ADHOC_DAILY_SQL, range_start), repeat=2)
+    timed("profit via invoices GROUP BY", lambda: adhoc(ADHOC_PROFIT_SQL, month_start), repeat=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Burst barcode scanning: /api/scan vs lookup + form post + page reload.
+
+A busy counter scans items back to back. The old flow per scan was
+/api/product, then POST /billing/add and the redirect to a re-rendered
+/billing page; /api/scan does it in one JSON round trip. Runs through
+Flask's test client against a scratch MySQL database.
+
+    python benchmarks/bench_scan.py --products 20000 --counters 4 --scans 300
+"""
+import argparse
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from db import connect, create_scratch_db, seed_products
+from synthetic import products, percentile
+from load_app import logged_in
+
+import config
+
+TARGET_MS = 10
+
+
+def scan_new(client, code):
+    return client.post('/api/scan', json={"code": code, "qty": 1}).status_code == 200
+
+
+def scan_legacy(client, code):
+    r = client.get('/api/product', query_string={'query': code})
+    if r.status_code != 200:
+        return False
+    client.post('/billing/add', data={'product_id': r.get_json()['id'], 'quantity': 1},
+                follow_redirects=True).get_data()
+    return True
+
+
+def run(label, app, scan, catalogue, args):
+    latencies, misses = [], []
+
+    def counter(n):
+        rnd = random.Random(n)
+        for k in range(args.scans):
+            if k % args.lines == 0:
+                # next customer: fresh cart, and a basket that repeats
+                # some items like a real bill
+                client = logged_in(app)
+                basket = [rnd.choice(catalogue)[2] for _ in range(args.lines // 2 or 1)]
+            code = rnd.choice(basket)
+            start = time.perf_counter()
+            ok = scan(client, code)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if not ok:
+                misses.append(code)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.counters) as pool:
+        list(pool.map(counter, range(args.counters)))
+    elapsed = time.perf_counter() - start
+
+    under = sum(1 for ms in latencies if ms < TARGET_MS) / len(latencies) * 100
+    print(f"{label:<7} {len(latencies) / elapsed:8.1f} scans/s   "
+          f"p50 {percentile(latencies, 50):6.2f} ms   p99 {percentile(latencies, 99):6.2f} ms   "
+          f"{under:5.1f}% under {TARGET_MS} ms   {len(misses)} not found")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--db', default='bike_billing_bench')
+    ap.add_argument('--products', type=int, default=20000)
+    ap.add_argument('--counters', type=int, default=4)
+    ap.add_argument('--scans', type=int, default=300, help="scans per counter")
+    ap.add_argument('--lines', type=int, default=25, help="scans per bill")
+    args = ap.parse_args()
+
+    catalogue = products(args.products)
+    create_scratch_db(args.db)
+    conn = connect(args.db)
+    seed_products(conn, catalogue)
+    conn.close()
+
+    config.MYSQL_DB = args.db
+    config.INVOICE_PDF_DIR = tempfile.mkdtemp(prefix='invoice-pdfs-')
+    from app import app
+
+    # warm the index, as a running server would be
+    logged_in(app).get('/search-products', query_string={'q': 'a'})
+
+    run("legacy", app, scan_legacy, catalogue, args)
+    run("scan", app, scan_new, catalogue, args)
+
+
+if __name__ == '__main__':
+    main()
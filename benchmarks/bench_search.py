@@ -0,0 +1,88 @@
+"""Product search latency: in-memory index vs LIKE '%q%'.
+
+    python benchmarks/bench_search.py --products 50000
+    python benchmarks/bench_search.py --mysql      # real LIKE query + index built from the DB
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from search_index import ProductSearchIndex  # noqa: E402
+from synthetic import products, queries, percentile  # noqa: E402
+
+LIKE_SQL = """
+    SELECT id, part_no, part_name, sell_price, stock_qty
+    FROM products
+    WHERE part_no LIKE %s OR part_name LIKE %s
+    LIMIT 10
+"""
+
+
+def like_scan(rows, q):
+    # what MySQL does for a leading-wildcard LIKE: look at every row
+    q = q.lower()
+    out = []
+    for row in rows:
+        if q in row[1].lower() or q in row[3].lower():
+            out.append(row)
+            if len(out) == 10:
+                break
+    return out
+
+
+def timed(fn, qs):
+    samples = []
+    for q in qs:
+        start = time.perf_counter()
+        fn(q)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label, samples):
+    print(f"{label:<28} p50 {percentile(samples, 50):8.3f} ms   "
+          f"p99 {percentile(samples, 99):8.3f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--products', type=int, default=50000)
+    ap.add_argument('--queries', type=int, default=2000)
+    ap.add_argument('--mysql', action='store_true')
+    args = ap.parse_args()
+
+    if args.mysql:
+        import MySQLdb
+        import config
+        conn = MySQLdb.connect(host=config.MYSQL_HOST, user=config.MYSQL_USER,
+                               passwd=config.MYSQL_PASSWORD, db=config.MYSQL_DB)
+        cur = conn.cursor()
+        cur.execute("SELECT id, part_no, barcode, part_name, sell_price, stock_qty FROM products")
+        rows = cur.fetchall()
+    else:
+        rows = products(args.products)
+
+    start = time.perf_counter()
+    index = ProductSearchIndex()
+    index.load(rows)
+    print(f"indexed {len(index)} products in {time.perf_counter() - start:.2f} s")
+
+    qs = queries(rows, args.queries)
+
+    if args.mysql:
+        def like(q):
+            cur.execute(LIKE_SQL, (f"%{q}%", f"%{q}%"))
+            cur.fetchall()
+        report("MySQL LIKE '%q%'", timed(like, qs))
+    else:
+        report("full scan (LIKE '%q%')", timed(lambda q: like_scan(rows, q), qs))
+
+    report("ProductSearchIndex.search", timed(index.search, qs))
+    report("ProductSearchIndex.lookup", timed(index.lookup, [r[2] for r in rows[:args.queries]]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Stock summary read vs summing the ledger, and full ledger rebuild time.
+
+Needs a MySQL server (credentials from config.py); runs in a scratch DB.
+
+    python benchmarks/bench_stock_ledger.py --products 20000 --movements 2000000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from db import COMPANY, connect, create_scratch_db, seed_products
+from synthetic import products
+
+from stock_ledger import stock_summary, rebuild_summary
+
+LEDGER_SUM_SQL = """
+    SELECT p.part_no, p.part_name, COALESCE(SUM(m.qty_change), 0), p.min_stock
+    FROM products p
+    LEFT JOIN stock_movements m ON m.product_id = p.id
+    GROUP BY p.id
+    ORDER BY p.part_name
+"""
+
+
+def seed_movements(conn, n_products, n, chunk=20000):
+    rnd = random.Random(1)
+    start = datetime(2024, 1, 1)
+    cur = conn.cursor()
+    for lo in range(0, n, chunk):
+        rows = []
+        for i in range(lo, min(lo + chunk, n)):
+            pid = rnd.randint(1, n_products)
+            when = start + timedelta(seconds=i * 30)
+            if rnd.random() < 0.2:
+                rows.append((pid, 'PURCHASE', rnd.randint(5, 50), round(rnd.uniform(10, 3000), 2), None, when))
+            else:
+                rows.append((pid, 'SALE', -rnd.randint(1, 3), None, None, when))
+        cur.executemany("""
+            INSERT INTO stock_movements
+            (product_id, movement_type, qty_change, unit_cost, ref, created_at)
+            VALUES (%s,%s,%s,%s,%s,%s)
+        """, rows)
+        conn.commit()
+    cur.close()
+
+
+def timed(label, fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<36} {best * 1000:10.1f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--db', default='bike_billing_bench')
+    ap.add_argument('--products', type=int, default=20000)
+    ap.add_argument('--movements', type=int, default=2000000)
+    ap.add_argument('--batch', type=int, default=500000)
+    args = ap.parse_args()
+
+    conn = create_scratch_db(args.db)
+    seed_products(conn, products(args.products))
+
+    start = time.perf_counter()
+    seed_movements(conn, args.products, args.movements)
+    print(f"seeded {args.movements} movements in {time.perf_counter() - start:.1f} s")
+
+    start = time.perf_counter()
+    rebuild_summary(connect(args.db), batch=args.batch)
+    print(f"rebuild_summary (batch {args.batch})     {time.perf_counter() - start:10.1f} s")
+
+    cur = conn.cursor()
+    timed("stock summary page (stock_summary)", lambda: stock_summary(cur, COMPANY['id']))
+
+    def ledger_sum():
+        cur.execute(LEDGER_SUM_SQL)
+        cur.fetchall()
+    timed("same page summed from the ledger", ledger_sum, repeat=1)
+
+
+if __name__ == '__main__':
+    main()
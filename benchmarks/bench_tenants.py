@@ -0,0 +1,126 @@
+"""Skewed tenants: does a big shop slow down a small one?
+
+Seeds several companies of very different sizes in one scratch database,
+then runs the load_app customer round (search, scan, add, finalize,
+invoice PDF, invoice list) for each shop: first each shop on its own,
+then all shops at once. With company-scoped indexes and per-company
+caches, a small shop's latencies should barely move when the big shop
+is busy, and its first search (index load) should cost in proportion
+to its own catalogue, not the whole table.
+
+    python benchmarks/bench_tenants.py --sizes 200000,20000,500 --rounds 100
+"""
+import argparse
+import random
+import tempfile
+import threading
+import time
+
+from db import connect, create_scratch_db, seed_products
+from synthetic import products, queries
+from load_app import Recorder, customer, logged_in, seed_invoices
+
+import config
+
+REPORTED = ('search_products', 'finalize_bill', 'invoice_list')
+
+
+def seed_tenants(db, sizes):
+    # company 1 comes with the schema; add the rest. Product ids are
+    # offset so every shop has its own id range.
+    conn = connect(db)
+    cur = conn.cursor()
+    tenants, offset = [], 0
+    for n, size in enumerate(sizes, start=1):
+        code = 'SV' if n == 1 else f"T{n}"
+        cur.execute("""
+            INSERT INTO companies (id, code, name) VALUES (%s,%s,%s)
+            ON DUPLICATE KEY UPDATE name = VALUES(name)
+        """, (n, code, f"SHOP {n} ({size} parts)"))
+        conn.commit()
+
+        catalogue = [(r[0] + offset,) + r[1:5] + (10 ** 6,) for r in products(size, seed=n)]
+        seed_products(conn, catalogue, company_id=n)
+        company = {"id": n, "code": code}
+        seed_invoices(conn, catalogue, max(size // 10, 50), company=company)
+        tenants.append({"company": company, "size": size, "catalogue": catalogue})
+        offset += size
+    cur.close()
+    conn.close()
+    return tenants
+
+
+def run_tenant(app, tenant, rounds, lines):
+    rec = Recorder(app)
+    client = logged_in(app, tenant['company']['id'])
+    rnd = random.Random(tenant['company']['id'])
+    terms = queries(tenant['catalogue'], 500)
+    last_invoice = [None]
+
+    # first search loads this shop's index
+    start = time.perf_counter()
+    client.get('/search-products', query_string={'q': terms[0]})
+    tenant['index_load_ms'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for n in range(rounds):
+        customer(rec, client, tenant['catalogue'], terms, rnd, n, lines, last_invoice)
+    return rec.report(time.perf_counter() - start)
+
+
+def cold(app_module, tenants):
+    # drop every shop's index so each phase measures the index load
+    for t in tenants:
+        app_module.product_indexes.get(t['company']['id']).invalidate()
+
+
+def show(phase, tenants, results):
+    print(f"\n{phase}")
+    for tenant, result in zip(tenants, results):
+        cells = []
+        for endpoint in REPORTED:
+            r = result['routes'].get(endpoint)
+            if r:
+                cells.append(f"{endpoint} p50 {r['p50_ms']:7.2f} p99 {r['p99_ms']:7.2f} ms "
+                             f"({r['queries_per_request']:.1f} q)")
+        print(f"  {tenant['company']['code']:<4} {tenant['size']:>7} parts   "
+              f"index load {tenant['index_load_ms']:8.1f} ms   " + "   ".join(cells))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--db', default='bike_billing_bench')
+    ap.add_argument('--sizes', default='200000,20000,500', help="products per shop")
+    ap.add_argument('--rounds', type=int, default=100, help="customers per shop")
+    ap.add_argument('--lines', type=int, default=8)
+    args = ap.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',')]
+    create_scratch_db(args.db)
+    tenants = seed_tenants(args.db, sizes)
+
+    config.MYSQL_DB = args.db
+    config.INVOICE_PDF_DIR = tempfile.mkdtemp(prefix='invoice-pdfs-')
+    import app as app_module
+    app = app_module.app
+
+    cold(app_module, tenants)
+    results = [run_tenant(app, t, args.rounds, args.lines) for t in tenants]
+    show("each shop alone", tenants, results)
+
+    cold(app_module, tenants)
+    results = [None] * len(tenants)
+
+    def one(i):
+        results[i] = run_tenant(app, tenants[i], args.rounds, args.lines)
+
+    threads = [threading.Thread(target=one, args=(i,)) for i in range(len(tenants))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    show("all shops at once", tenants, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import os
+import sys
+
+import MySQLdb
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import config  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+# schema.sql creates company 1; single-shop benchmarks bill as it
+COMPANY = {"id": 1, "code": "SV"}
+
+# -------------------------------------------------
+# SCRATCH DATABASE FOR BENCHMARKS
+# -------------------------------------------------
+# Benchmarks never touch config.MYSQL_DB. They build their own database
+# from schema.sql on the same server (default: bike_billing_bench).
+
+
+def schema_statements():
+    with open(os.path.join(ROOT, 'schema.sql')) as f:
+        sql = "".join(l for l in f if not l.strip().startswith('--'))
+    return [stmt for stmt in sql.split(';') if stmt.strip()]
+
+
+def connect(db):
+    return MySQLdb.connect(host=config.MYSQL_HOST, user=config.MYSQL_USER,
+                           passwd=config.MYSQL_PASSWORD, db=db)
+
+
+def create_scratch_db(db):
+    if db == config.MYSQL_DB:
+        raise SystemExit(f"refusing to reset the live database {db!r}")
+
+    conn = MySQLdb.connect(host=config.MYSQL_HOST, user=config.MYSQL_USER,
+                           passwd=config.MYSQL_PASSWORD)
+    cur = conn.cursor()
+    cur.execute(f"DROP DATABASE IF EXISTS `{db}`")
+    cur.execute(f"CREATE DATABASE `{db}`")
+    cur.execute(f"USE `{db}`")
+    for stmt in schema_statements():
+        cur.execute(stmt)
+    conn.commit()
+    cur.close()
+    return conn
+
+
+def seed_products(conn, rows, chunk=5000, company_id=COMPANY['id']):
+    # rows are (id, part_no, barcode, part_name, sell_price, stock_qty).
+    # VALUES must be placeholders only, or executemany sends one INSERT
+    # per row instead of one per chunk.
+    cur = conn.cursor()
+    for i in range(0, len(rows), chunk):
+        cur.executemany("""
+            INSERT INTO products
+            (id, company_id, part_no, barcode, part_name, mrp, sell_price, stock_qty, min_stock, gst_percent)
+            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+        """, [(r[0], company_id, r[1], r[2], r[3], r[4], r[4], r[5], 5, 18) for r in rows[i:i + chunk]])
+    conn.commit()
+    cur.close()
@@ -0,0 +1,232 @@
+"""Load test: the billing hot paths through the real Flask app.
+
+Drives the app with Flask's test client (no HTTP server) against a
+scratch MySQL database seeded with a realistic catalogue and invoice
+history. Each round is one customer at the counter:
+
+    3 x /search-products, 1 x /api/product (barcode scan),
+    N x /billing/add, /finalize, /invoice/<no>, and every 10th
+    round /invoice-list
+
+and reports requests/s, latency percentiles and DB queries per request
+(from the X-DB-Queries header) per endpoint.
+
+    python benchmarks/load_app.py --products 20000 --invoices 2000 --rounds 200
+    python benchmarks/load_app.py --out before.json
+    python benchmarks/load_app.py --out after.json --compare before.json
+
+--replay FILE runs a captured request log instead of the built-in round.
+One JSON object per line:
+
+    {"method": "GET", "path": "/search-products?q=brake"}
+    {"method": "POST", "path": "/billing/add", "form": {"product_id": 7, "quantity": 1}}
+    {"method": "GET", "path": "/invoice/{invoice_no}"}
+
+{invoice_no} is replaced by the last invoice finalized during the run.
+Lines without a method and path are skipped; a file with none is an
+error.
+"""
+import argparse
+import json
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from db import COMPANY, connect, create_scratch_db, seed_products
+from synthetic import products, queries, percentile
+
+import config
+
+from invoicing import save_invoice
+
+
+def seed_invoices(conn, catalogue, n, lines=8, seed=3, company=COMPANY):
+    # n bills spread over the last 90 days
+    rnd = random.Random(seed)
+    start = datetime.now() - timedelta(days=90)
+    for k in range(n):
+        items = []
+        for row in rnd.sample(catalogue, lines):
+            qty = rnd.randint(1, 3)
+            items.append({"product_id": row[0], "qty": qty,
+                          "price": row[4], "total": round(qty * row[4], 2)})
+        save_invoice(conn, company, items, created_at=start + timedelta(minutes=k * 90 * 24 * 60 // n))
+
+
+class Recorder:
+
+    def __init__(self, app):
+        self.urls = app.url_map.bind('localhost')
+        self.lock = threading.Lock()
+        self.latency = defaultdict(list)
+        self.db_queries = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def endpoint(self, method, path):
+        try:
+            return self.urls.match(path.split('?')[0], method=method)[0]
+        except Exception:
+            return path.split('?')[0]
+
+    def call(self, client, method, path, **kwargs):
+        start = time.perf_counter()
+        response = client.open(path, method=method, **kwargs)
+        response.get_data()
+        ms = (time.perf_counter() - start) * 1000
+
+        endpoint = self.endpoint(method, path)
+        with self.lock:
+            self.latency[endpoint].append(ms)
+            self.statuses[endpoint][response.status_code] += 1
+            if 'X-DB-Queries' in response.headers:
+                self.db_queries[endpoint].append(int(response.headers['X-DB-Queries']))
+        return response
+
+    def report(self, elapsed):
+        routes = {}
+        for endpoint, samples in sorted(self.latency.items()):
+            queries = self.db_queries.get(endpoint) or [0]
+            routes[endpoint] = {
+                "requests": len(samples),
+                "p50_ms": round(percentile(samples, 50), 2),
+                "p95_ms": round(percentile(samples, 95), 2),
+                "p99_ms": round(percentile(samples, 99), 2),
+                "queries_per_request": round(sum(queries) / len(queries), 2),
+                "statuses": dict(self.statuses[endpoint]),
+            }
+        total = sum(len(s) for s in self.latency.values())
+        return {"requests": total, "seconds": round(elapsed, 2),
+                "rps": round(total / elapsed, 1), "routes": routes}
+
+
+def logged_in(app, company_id=COMPANY['id']):
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s['user'] = 'bench'
+        s['company_id'] = company_id
+    return client
+
+
+def customer(rec, client, catalogue, search_terms, rnd, round_no, lines, last_invoice):
+    for q in rnd.sample(search_terms, 3):
+        rec.call(client, 'GET', '/search-products', query_string={'q': q})
+    rec.call(client, 'GET', '/api/product', query_string={'query': rnd.choice(catalogue)[2]})
+
+    for row in rnd.sample(catalogue, lines):
+        rec.call(client, 'POST', '/billing/add',
+                 data={'product_id': row[0], 'quantity': rnd.randint(1, 3)})
+
+    response = rec.call(client, 'POST', '/finalize')
+    location = response.headers.get('Location', '')
+    if '/invoice/' in location:
+        last_invoice[0] = location.rsplit('/', 1)[1]
+        rec.call(client, 'GET', f"/invoice/{last_invoice[0]}")
+
+    if round_no % 10 == 0:
+        rec.call(client, 'GET', '/invoice-list')
+
+
+def replay_lines(path):
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict) and entry.get('method') and entry.get('path'):
+                yield entry
+
+
+def replay(rec, client, entries, last_invoice):
+    for entry in entries:
+        path = entry['path'].replace('{invoice_no}', last_invoice[0] or '')
+        response = rec.call(client, entry['method'].upper(), path,
+                            data=entry.get('form'), json=entry.get('json'))
+        location = response.headers.get('Location', '')
+        if '/invoice/' in location:
+            last_invoice[0] = location.rsplit('/', 1)[1]
+
+
+def compare(result, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_path}: rps {baseline['rps']} -> {result['rps']}")
+    for endpoint, now in result['routes'].items():
+        before = baseline['routes'].get(endpoint)
+        if not before:
+            continue
+        print(f"{endpoint:<20} p50 {before['p50_ms']:8.2f} -> {now['p50_ms']:8.2f} ms   "
+              f"p95 {before['p95_ms']:8.2f} -> {now['p95_ms']:8.2f} ms   "
+              f"queries {before['queries_per_request']:5.1f} -> {now['queries_per_request']:5.1f}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--db', default='bike_billing_bench')
+    ap.add_argument('--products', type=int, default=20000)
+    ap.add_argument('--invoices', type=int, default=2000)
+    ap.add_argument('--rounds', type=int, default=200)
+    ap.add_argument('--lines', type=int, default=8)
+    ap.add_argument('--workers', type=int, default=1)
+    ap.add_argument('--replay', help="JSONL request log to run instead of the built-in round")
+    ap.add_argument('--out', help="write the results here as JSON")
+    ap.add_argument('--compare', help="results JSON from an earlier run")
+    args = ap.parse_args()
+
+    entries = None
+    if args.replay:
+        entries = list(replay_lines(args.replay))
+        if not entries:
+            ap.error(f"{args.replay}: no lines with a method and path to replay")
+
+    # stock high enough that no bill in the run fails for stock
+    catalogue = [r[:5] + (10**6,) for r in products(args.products)]
+    create_scratch_db(args.db)
+    conn = connect(args.db)
+    seed_products(conn, catalogue)
+    seed_invoices(conn, catalogue, args.invoices)
+    conn.close()
+
+    # the app reads config at import: point it at the scratch DB first
+    config.MYSQL_DB = args.db
+    config.INVOICE_PDF_DIR = tempfile.mkdtemp(prefix='invoice-pdfs-')
+    from app import app
+
+    rec = Recorder(app)
+    search_terms = queries(catalogue, 1000)
+
+    def worker(w):
+        client = logged_in(app)
+        rnd = random.Random(w)
+        last_invoice = [None]
+        if entries is not None:
+            replay(rec, client, entries, last_invoice)
+            return
+        for n in range(w, args.rounds, args.workers):
+            customer(rec, client, catalogue, search_terms, rnd, n, args.lines, last_invoice)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.workers) as pool:
+        list(pool.map(worker, range(args.workers)))
+    result = rec.report(time.perf_counter() - start)
+
+    print(f"{result['requests']} requests in {result['seconds']} s  ({result['rps']} req/s, "
+          f"{args.workers} worker(s))")
+    for endpoint, r in result['routes'].items():
+        print(f"{endpoint:<20} {r['requests']:6d}   p50 {r['p50_ms']:8.2f} ms   "
+              f"p95 {r['p95_ms']:8.2f} ms   p99 {r['p99_ms']:8.2f} ms   "
+              f"{r['queries_per_request']:5.1f} queries/req   {r['statuses']}")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == '__main__':
+    main()
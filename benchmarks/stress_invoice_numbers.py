@@ -0,0 +1,66 @@
+"""Concurrent finalizes must get unique, gapless invoice numbers.
+
+Needs a MySQL server (credentials from config.py); runs in a scratch DB.
+
+    python benchmarks/stress_invoice_numbers.py --workers 16 --bills 100
+"""
+import argparse
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from db import COMPANY, connect, create_scratch_db, seed_products
+from synthetic import products
+
+from invoicing import save_invoice, OutOfStock
+
+OUT_OF_STOCK_ID = 1
+
+
+def worker(db, seed, bills):
+    # every 7th bill asks for a part that has no stock and must roll back
+    conn = connect(db)
+    rnd = random.Random(seed)
+    issued = []
+    for n in range(bills):
+        pid = OUT_OF_STOCK_ID if n % 7 == 0 else rnd.randint(2, 500)
+        try:
+            _, invoice_no = save_invoice(conn, COMPANY, [{"product_id": pid, "qty": 1, "price": 1, "total": 1}])
+            issued.append(invoice_no)
+        except OutOfStock:
+            pass
+    return issued
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--db', default='bike_billing_bench')
+    ap.add_argument('--workers', type=int, default=16)
+    ap.add_argument('--bills', type=int, default=100, help="bills per worker")
+    args = ap.parse_args()
+
+    catalogue = [r[:5] + (0 if r[0] == OUT_OF_STOCK_ID else 10 ** 6,) for r in products(500)]
+    seed_products(create_scratch_db(args.db), catalogue)
+
+    with ProcessPoolExecutor(args.workers) as pool:
+        results = pool.map(worker, [args.db] * args.workers, range(args.workers),
+                           [args.bills] * args.workers)
+        issued = [no for batch in results for no in batch]
+
+    cur = connect(args.db).cursor()
+    cur.execute("SELECT invoice_no FROM invoices")
+    stored = [row[0] for row in cur.fetchall()]
+    numbers = sorted(int(no.split('-')[-1]) for no in stored)
+
+    duplicates = len(numbers) - len(set(numbers))
+    gaps = sorted(set(range(1, len(numbers) + 1)) - set(numbers))
+
+    print(f"{len(issued)} bills committed, {len(stored)} invoices stored")
+    print(f"duplicates: {duplicates}   gaps: {gaps[:10]}{' ...' if len(gaps) > 10 else ''}")
+    if duplicates or gaps or sorted(issued) != sorted(stored):
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import random
+
+# -------------------------------------------------
+# SYNTHETIC CATALOGUE FOR BENCHMARKS
+# -------------------------------------------------
+BRANDS = ["HERO", "HONDA", "BAJAJ", "TVS", "YAMAHA", "SUZUKI", "KTM", "ROYAL ENFIELD"]
+PARTS = ["BRAKE SHOE", "CLUTCH PLATE", "CHAIN SPROCKET KIT", "AIR FILTER", "OIL FILTER",
+         "SPARK PLUG", "HEAD LAMP", "TAIL LAMP", "INDICATOR", "MIRROR", "ACCELERATOR CABLE",
+         "CLUTCH CABLE", "BRAKE CABLE", "SPEEDO CABLE", "CARBURETOR", "PISTON KIT",
+         "GASKET SET", "BEARING", "SHOCK ABSORBER", "HANDLE GRIP", "SEAT COVER",
+         "FUEL TAP", "HORN", "BATTERY", "RELAY", "CDI UNIT", "SELF MOTOR", "TYRE", "TUBE"]
+MODELS = ["SPLENDOR", "PASSION", "SHINE", "UNICORN", "PULSAR", "PLATINA", "APACHE",
+          "JUPITER", "FZ", "R15", "ACCESS", "DUKE", "CLASSIC 350", "ACTIVA", "DIO"]
+
+
+def products(n, seed=42):
+    # rows are (id, part_no, barcode, part_name, sell_price, stock_qty)
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(1, n + 1):
+        brand = rnd.choice(BRANDS)
+        name = f"{rnd.choice(PARTS)} {rnd.choice(MODELS)} {brand}"
+        part_no = f"{brand[:2]}-{i:06d}"
+        barcode = f"890{rnd.randrange(10**9):09d}{i % 10}"
+        rows.append((i, part_no, barcode, name,
+                     round(rnd.uniform(20, 4000), 2), rnd.randrange(0, 200)))
+    return rows
+
+
+def queries(rows, n, seed=7):
+    # what a cashier types: a few leading chars of a part no, a name word, a barcode
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(n):
+        _, part_no, barcode, name, _, _ = rnd.choice(rows)
+        kind = rnd.random()
+        if kind < 0.3:
+            out.append(part_no[:rnd.randint(2, len(part_no))])
+        elif kind < 0.8:
+            word = rnd.choice(name.split())
+            out.append(word[:rnd.randint(1, len(word))])
+        else:
+            out.append(barcode)
+    return out
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    k = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+    return samples[k]
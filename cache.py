@@ -0,0 +1,68 @@
+import threading
+import time
+from collections import OrderedDict
+
+# -------------------------------------------------
+# BOUNDED LRU CACHE (OPTIONAL TTL)
+# -------------------------------------------------
+# Process-local and thread-safe. Entries idle for longer than `ttl`
+# seconds are dropped; past `maxsize` the least recently used go first.
+# With refresh=False reads do not restart the clock, so `ttl` is the
+# entry's maximum age since it was set, however often it is read.
+
+
+class LRUCache:
+
+    def __init__(self, maxsize=1000, ttl=None, refresh=True):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.refresh = refresh
+        self._data = OrderedDict()   # key -> (value, last_used or set time)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            if self.refresh:
+                self._data[key] = (entry[0], now)
+            elif self.ttl is not None and now - entry[1] > self.ttl:
+                # read order no longer matches age, so _expire can miss it
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._data[key] = (value, now)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            self._expire(now)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _expire(self, now):
+        # oldest entries sit at the front, so this stops at the first live one
+        if self.ttl is None:
+            return
+        while self._data:
+            key, (_, last_used) = next(iter(self._data.items()))
+            if now - last_used <= self.ttl:
+                return
+            del self._data[key]
@@ -0,0 +1,207 @@
+import sqlite3
+import threading
+import time
+import uuid
+
+from cache import LRUCache
+
+# -------------------------------------------------
+# SERVER-SIDE CART STORE
+# -------------------------------------------------
+# The billing cart used to live in session['bill_items'], so Flask
+# re-serialized and re-signed the whole cart into the cookie on every
+# request (and large bills hit the ~4 KB cookie limit). Now the cookie
+# only holds a cart id; carts live in an in-process LRU with an idle TTL.
+#
+# With a SQLite file configured, that file is the source of truth: every
+# change is written through (one row per line) and every request reloads
+# the cart from it (one indexed read), so all worker processes see the
+# same cart and one that another worker finalized comes back empty.
+# Without it, carts are memory-only in the LRU and run with a single
+# worker process (or sticky sessions).
+#
+# A scanner fires requests back to back, so two adds for one cart can
+# run at once. add/update/remove hold a per-cart lock (striped), and in
+# SQLite an add is one atomic `qty = qty + n` upsert, so adds from other
+# worker processes are not lost either.
+
+LOCK_STRIPES = 64
+
+
+class Cart:
+
+    def __init__(self, lines=()):
+        self.lines = {}          # product_id -> line dict, in add order
+        self.grand_total = 0.0
+        for line in lines:
+            self.lines[line['product_id']] = line
+            self.grand_total += line['total']
+
+    def items(self):
+        # same shape the templates and save_invoice expect
+        return list(self.lines.values())
+
+    def set_qty(self, product_id, qty):
+        line = self.lines[product_id]
+        total = round(qty * line['price'], 2)
+        self.grand_total += total - line['total']
+        line['qty'] = qty
+        line['total'] = total
+        return line
+
+    def add_line(self, product_id, part_name, price, qty):
+        line = {"product_id": product_id, "part_name": part_name,
+                "qty": 0, "price": float(price), "total": 0.0}
+        self.lines[product_id] = line
+        return self.set_qty(product_id, qty)
+
+    def remove(self, product_id):
+        line = self.lines.pop(product_id, None)
+        if line:
+            self.grand_total -= line['total']
+        return line
+
+
+class SqliteCartBackend:
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS cart_lines (
+                    cart_id TEXT NOT NULL,
+                    product_id INTEGER NOT NULL,
+                    part_name TEXT NOT NULL,
+                    qty INTEGER NOT NULL,
+                    price REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (cart_id, product_id)
+                )
+            """)
+            self._conn.commit()
+
+    def load(self, cart_id, ttl):
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT product_id, part_name, qty, price
+                FROM cart_lines
+                WHERE cart_id = ? AND updated_at > ?
+                ORDER BY rowid
+            """, (cart_id, time.time() - ttl)).fetchall()
+        return [{"product_id": pid, "part_name": name, "qty": qty, "price": price,
+                 "total": round(qty * price, 2)} for pid, name, qty, price in rows]
+
+    def put(self, cart_id, line):
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO cart_lines (cart_id, product_id, part_name, qty, price, updated_at)
+                VALUES (?,?,?,?,?,?)
+                ON CONFLICT (cart_id, product_id)
+                DO UPDATE SET qty = excluded.qty, updated_at = excluded.updated_at
+            """, (cart_id, line['product_id'], line['part_name'], line['qty'],
+                  line['price'], time.time()))
+            self._conn.commit()
+
+    def add(self, cart_id, line, qty, ttl):
+        # -> the line's qty after adding qty; a line past ttl starts over
+        now = time.time()
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO cart_lines (cart_id, product_id, part_name, qty, price, updated_at)
+                VALUES (?,?,?,?,?,?)
+                ON CONFLICT (cart_id, product_id)
+                DO UPDATE SET
+                    qty = CASE WHEN cart_lines.updated_at > ?
+                               THEN cart_lines.qty + excluded.qty ELSE excluded.qty END,
+                    updated_at = excluded.updated_at
+            """, (cart_id, line['product_id'], line['part_name'], qty, line['price'],
+                  now, now - ttl))
+            (total,) = self._conn.execute(
+                "SELECT qty FROM cart_lines WHERE cart_id = ? AND product_id = ?",
+                (cart_id, line['product_id'])).fetchone()
+            self._conn.commit()
+        return total
+
+    def delete(self, cart_id, product_id=None):
+        with self._lock:
+            if product_id is None:
+                self._conn.execute("DELETE FROM cart_lines WHERE cart_id = ?", (cart_id,))
+            else:
+                self._conn.execute("DELETE FROM cart_lines WHERE cart_id = ? AND product_id = ?",
+                                   (cart_id, product_id))
+            self._conn.commit()
+
+    def purge(self, ttl):
+        with self._lock:
+            self._conn.execute("DELETE FROM cart_lines WHERE updated_at <= ?", (time.time() - ttl,))
+            self._conn.commit()
+
+
+class CartStore:
+
+    def __init__(self, maxsize=1000, ttl=8 * 3600, backend=None):
+        self.ttl = ttl
+        self.backend = backend
+        self._carts = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        if backend:
+            backend.purge(ttl)
+
+    @staticmethod
+    def new_id():
+        return uuid.uuid4().hex
+
+    def get(self, cart_id):
+        if self.backend:
+            return Cart(self.backend.load(cart_id, self.ttl))
+        cart = self._carts.get(cart_id)
+        if cart is None:
+            cart = Cart()
+            self._carts.set(cart_id, cart)
+        return cart
+
+    def _lock(self, cart_id):
+        return self._locks[hash(cart_id) % LOCK_STRIPES]
+
+    def add(self, cart_id, product_id, qty, lookup):
+        # lookup(product_id) -> (part_name, price) or None; only called for
+        # products that are not in the cart yet
+        with self._lock(cart_id):
+            cart = self.get(cart_id)
+            line = cart.lines.get(product_id)
+            if line is None:
+                product = lookup(product_id)
+                if not product:
+                    return None
+                line = cart.add_line(product_id, product[0], product[1], 0)
+            if self.backend:
+                return cart.set_qty(product_id, self.backend.add(cart_id, line, qty, self.ttl))
+            return cart.set_qty(product_id, line['qty'] + qty)
+
+    def update(self, cart_id, product_id, qty):
+        with self._lock(cart_id):
+            cart = self.get(cart_id)
+            if product_id not in cart.lines:
+                return None
+            if qty <= 0:
+                return self._remove(cart, cart_id, product_id)
+            line = cart.set_qty(product_id, qty)
+            if self.backend:
+                self.backend.put(cart_id, line)
+            return line
+
+    def remove(self, cart_id, product_id):
+        with self._lock(cart_id):
+            return self._remove(self.get(cart_id), cart_id, product_id)
+
+    def _remove(self, cart, cart_id, product_id):
+        line = cart.remove(product_id)
+        if line and self.backend:
+            self.backend.delete(cart_id, product_id)
+        return line
+
+    def clear(self, cart_id):
+        self._carts.pop(cart_id)
+        if self.backend:
+            self.backend.delete(cart_id)
@@ -0,0 +1,158 @@
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+
+import MySQLdb
+
+# -------------------------------------------------
+# BULK CATALOGUE IMPORT / EXPORT
+# -------------------------------------------------
+# A distributor price list (CSV or XLSX) is read row by row and upserted
+# in chunks: one executemany INSERT ... ON DUPLICATE KEY UPDATE per chunk,
+# matched on the company's unique part_no / barcode keys. Only one chunk
+# is held in memory at a time.
+#
+# Stock is not imported. New parts start at the column default (0) and
+# stock comes in through purchase entry, so the stock ledger stays
+# complete. The VALUES list must be placeholders only: anything else and
+# MySQLdb's executemany falls back to one INSERT per row.
+
+COLUMNS = ('part_no', 'barcode', 'part_name', 'mrp', 'sell_price', 'min_stock', 'gst_percent')
+REQUIRED = ('part_no', 'part_name', 'sell_price')
+CHUNK = 1000
+
+MAX_PRICE = Decimal('99999999.99')     # DECIMAL(10,2)
+MAX_MIN_STOCK = 2 ** 31 - 1            # INT
+
+UPSERT_SQL = """
+    INSERT INTO products
+    (company_id, part_no, barcode, part_name, mrp, sell_price, min_stock, gst_percent)
+    VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
+    ON DUPLICATE KEY UPDATE
+        barcode = VALUES(barcode),
+        part_name = VALUES(part_name),
+        mrp = VALUES(mrp),
+        sell_price = VALUES(sell_price),
+        min_stock = VALUES(min_stock),
+        gst_percent = VALUES(gst_percent)
+"""
+
+
+def read_rows(stream, filename):
+    # yields dicts keyed by lower-cased header
+    if filename.lower().endswith('.xlsx'):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("XLSX import needs openpyxl (pip install openpyxl)")
+        rows = load_workbook(stream, read_only=True).active.iter_rows(values_only=True)
+        header = [str(h or '').strip().lower() for h in next(rows, ())]
+        for row in rows:
+            yield dict(zip(header, row))
+    else:
+        reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+        for row in reader:
+            yield {(k or '').strip().lower(): v for k, v in row.items()}
+
+
+def _text(value):
+    # spreadsheets hand back numeric part numbers / barcodes as floats
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value if value is not None else '').strip()
+
+
+def _number(value, default=0):
+    if value is None or str(value).strip() == '':
+        return Decimal(default)
+    number = Decimal(str(value).replace(',', '').strip())
+    if not number.is_finite():
+        raise ValueError("bad number")
+    return number
+
+
+def validate(row):
+    # -> tuple in COLUMNS order, or raises ValueError
+    for field in REQUIRED:
+        if not _text(row.get(field)):
+            raise ValueError(f"missing {field}")
+    try:
+        sell_price = _number(row['sell_price'])
+        mrp = _number(row.get('mrp'), sell_price)
+        min_stock = int(_number(row.get('min_stock')))
+        gst = _number(row.get('gst_percent'))
+    except (InvalidOperation, ValueError):
+        raise ValueError("bad number")
+    if not 0 <= sell_price <= MAX_PRICE or not 0 <= mrp <= MAX_PRICE \
+            or not 0 <= min_stock <= MAX_MIN_STOCK or not 0 <= gst <= 100:
+        raise ValueError("value out of range")
+
+    return (_text(row['part_no']), _text(row.get('barcode')) or None, _text(row['part_name']),
+            mrp, sell_price, min_stock, gst)
+
+
+def import_rows(conn, company_id, rows, chunk=CHUNK, max_errors=100):
+    # Upserts `rows` and yields a progress dict after every chunk:
+    # {"rows": seen, "imported": upserted, "rejected": n,
+    #  "errors": [(row_no, message)]}  (first max_errors only)
+    # A chunk MySQL refuses (e.g. a row whose part_no and barcode belong
+    # to two different products) is rolled back and rejected as a whole;
+    # the import carries on with the next chunk.
+    cur = conn.cursor()
+    batch, errors = [], []
+    seen = imported = rejected = 0
+    first = None
+
+    def flush():
+        nonlocal imported, rejected
+        try:
+            cur.executemany(UPSERT_SQL, batch)
+            conn.commit()
+            imported += len(batch)
+        except MySQLdb.Error as e:
+            conn.rollback()
+            rejected += len(batch)
+            if len(errors) < max_errors:
+                errors.append((first, f"rows {first}-{seen + 1} not imported: {e.args[-1]}"))
+
+    try:
+        for seen, row in enumerate(rows, start=1):
+            # row numbers as the user sees them: header is row 1
+            try:
+                batch.append((company_id,) + validate(row))
+                first = first or seen + 1
+            except ValueError as e:
+                rejected += 1
+                if len(errors) < max_errors:
+                    errors.append((seen + 1, str(e)))
+            if len(batch) == chunk:
+                flush()
+                batch, first = [], None
+                yield {"rows": seen, "imported": imported, "rejected": rejected, "errors": errors}
+        if batch:
+            flush()
+        yield {"rows": seen, "imported": imported, "rejected": rejected, "errors": errors,
+               "done": True}
+    finally:
+        cur.close()
+
+
+def export_csv(cur, company_id, chunk=CHUNK):
+    # cur should be a server-side cursor; yields CSV text a chunk at a time
+    cur.execute(f"""
+        SELECT {", ".join(COLUMNS)}, stock_qty
+        FROM products
+        WHERE company_id = %s
+        ORDER BY part_no
+    """, (company_id,))
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS + ('stock_qty',))
+    while True:
+        rows = cur.fetchmany(chunk)
+        writer.writerows(rows)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+        if not rows:
+            return
@@ -0,0 +1,70 @@
+import os
+import threading
+
+import config
+
+# -------------------------------------------------
+# COMPANIES (SHOPS)
+# -------------------------------------------------
+# Every shop's products, invoices, purchases, rollups and jobs carry its
+# company_id, and every index on those tables starts with company_id, so
+# one shop's queries only read that shop's index ranges.
+#
+# In-process state is split the same way: each company gets its own
+# search index, product page cache, invoice store and PDF cache (see
+# PerCompany), so a large catalogue reloading or churning an LRU never
+# evicts or blocks a small shop's entries.
+#
+# session['company_id'] is the shop the user picked on /company-select.
+
+
+class PerCompany:
+    # one lazily created instance per company id
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def get(self, company_id):
+        item = self._items.get(company_id)
+        if item is None:
+            with self._lock:
+                item = self._items.get(company_id)
+                if item is None:
+                    item = self._items[company_id] = self._factory(company_id)
+        return item
+
+    def values(self):
+        with self._lock:
+            return list(self._items.values())
+
+
+def _row(row):
+    company_id, code, name, period_from, period_to = row
+    return {"id": company_id, "code": code, "name": name,
+            "from": period_from, "to": period_to}
+
+
+def list_companies(cur):
+    cur.execute("""
+        SELECT id, code, name, period_from, period_to
+        FROM companies
+        ORDER BY name
+    """)
+    return [_row(r) for r in cur.fetchall()]
+
+
+def get_company(cur, company_id):
+    cur.execute("""
+        SELECT id, code, name, period_from, period_to
+        FROM companies
+        WHERE id = %s
+    """, (company_id,))
+    row = cur.fetchone()
+    return _row(row) if row else None
+
+
+def pdf_dir(company_id):
+    # rendered invoice PDFs, one cache directory per company
+    return os.path.join(config.INVOICE_PDF_DIR, str(company_id))
@@ -2,3 +2,35 @@ MYSQL_HOST = 'localhost'
 MYSQL_USER = 'root'
 MYSQL_PASSWORD = 'Tamilsecondmom@26'
 MYSQL_DB = 'bike_billing'
+
+# MySQL connection pool (per worker process). Connections older than
+# RECYCLE seconds are reopened; ones idle longer than PING_INTERVAL are
+# pinged before use. A request waits up to TIMEOUT seconds for a free one.
+MYSQL_POOL_SIZE = 10
+MYSQL_POOL_RECYCLE = 3600
+MYSQL_POOL_PING_INTERVAL = 30
+MYSQL_POOL_TIMEOUT = 10
+
+# Seconds before a worker reloads its in-memory product search index
+SEARCH_INDEX_TTL = 300
+
+# Rendered invoice PDFs are cached here (one subdirectory per company),
+# rendered by a small thread pool
+INVOICE_PDF_DIR = 'invoices'
+INVOICE_PDF_WORKERS = 2
+
+# Billing carts: kept in memory per worker, idle carts dropped after
+# CART_TTL seconds. Set CART_DB to a SQLite file path to persist them.
+CART_MAX_CARTS = 1000
+CART_TTL = 8 * 3600
+CART_DB = None
+
+# Seconds the first page of /products stays cached (cleared on any product write)
+PRODUCT_PAGE_CACHE_TTL = 60
+
+# Finalized invoices kept in memory for the print view and PDF
+INVOICE_CACHE_SIZE = 500
+
+# End-of-day jobs: worker processes, and where their CSV output goes
+JOB_WORKERS = 2
+JOB_OUTPUT_DIR = 'exports'
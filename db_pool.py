@@ -0,0 +1,260 @@
+import threading
+import time
+
+import MySQLdb
+import MySQLdb.cursors
+from flask import g
+
+# -------------------------------------------------
+# MYSQL CONNECTION POOL
+# -------------------------------------------------
+# Drop-in for flask_mysqldb.MySQL: `mysql.connection` still gives the
+# request its connection, but it is borrowed from a pool instead of being
+# opened and closed for every request.
+#
+#   MYSQL_POOL_SIZE           connections kept open per worker process
+#   MYSQL_POOL_RECYCLE        reconnect connections older than this (s)
+#   MYSQL_POOL_PING_INTERVAL  ping connections idle longer than this (s)
+#                             before handing them out (health check)
+#   MYSQL_POOL_TIMEOUT        wait this long for a free connection (s)
+#
+# Every connection handed out is wrapped so its statements are timed;
+# see QueryStats.
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+
+    def __init__(self, connect, size=10, recycle=3600, ping_interval=30, timeout=10):
+        self._connect = connect
+        self.size = size
+        self.recycle = recycle
+        self.ping_interval = ping_interval
+        self.timeout = timeout
+        self._idle = []                    # LIFO: (conn, created_at, last_used)
+        self._cond = threading.Condition()  # guards _idle and _open
+        self._open = 0
+
+    def acquire(self):
+        # -> (conn, created_at)
+        deadline = time.time() + self.timeout
+        while True:
+            entry = self._checkout(deadline)
+            if entry is None:
+                try:
+                    return self._connect(), time.time()
+                except Exception:
+                    self._unreserve()
+                    raise
+
+            conn, created, last_used = entry
+            if self._healthy(conn, created, last_used):
+                return conn, created
+            self._discard(conn)
+
+    def _checkout(self, deadline):
+        # -> an idle entry, or None once a slot for a new connection is
+        # reserved. Waiters are woken both by release() and by a slot
+        # freed in _discard(), e.g. after a MySQL restart.
+        with self._cond:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._open < self.size:
+                    self._open += 1
+                    return None
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise PoolTimeout(f"no free MySQL connection after {self.timeout}s")
+                self._cond.wait(remaining)
+
+    def release(self, conn, created):
+        try:
+            # never hand an open transaction to the next request
+            conn.rollback()
+        except MySQLdb.Error:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, created, time.time()))
+            self._cond.notify()
+
+    def _healthy(self, conn, created, last_used):
+        now = time.time()
+        if now - created > self.recycle:
+            return False
+        if now - last_used > self.ping_interval:
+            try:
+                conn.ping()
+            except MySQLdb.Error:
+                return False
+        return True
+
+    def _unreserve(self):
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def _discard(self, conn):
+        self._unreserve()
+        try:
+            conn.close()
+        except MySQLdb.Error:
+            pass
+
+
+# -------------------------------------------------
+# QUERY INSTRUMENTATION
+# -------------------------------------------------
+class QueryStats:
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest = (0.0, None)   # (seconds, sql)
+
+    def record(self, sql, seconds):
+        self.count += 1
+        self.seconds += seconds
+        if seconds > self.slowest[0]:
+            self.slowest = (seconds, " ".join(str(sql).split())[:300])
+
+
+class InstrumentedCursor:
+
+    def __init__(self, cursor, stats):
+        self._cursor = cursor
+        self._stats = stats
+
+    def execute(self, sql, args=None):
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, args)
+        finally:
+            self._stats.record(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, args):
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, args)
+        finally:
+            self._stats.record(sql, time.perf_counter() - start)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+
+    def __init__(self, conn, stats):
+        self._conn = conn
+        self.stats = stats
+
+    def cursor(self, cursorclass=None, dictionary=False):
+        if dictionary:
+            cursorclass = MySQLdb.cursors.DictCursor
+        cur = self._conn.cursor(cursorclass) if cursorclass else self._conn.cursor()
+        return InstrumentedCursor(cur, self.stats)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            self._conn.commit()
+        finally:
+            self.stats.record("COMMIT", time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class PooledMySQL:
+
+    def __init__(self, app=None):
+        self.pool = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        cfg = app.config
+
+        def connect():
+            return MySQLdb.connect(
+                host=cfg['MYSQL_HOST'],
+                user=cfg['MYSQL_USER'],
+                passwd=cfg['MYSQL_PASSWORD'],
+                db=cfg['MYSQL_DB'],
+                charset='utf8mb4'
+            )
+
+        self.pool = ConnectionPool(
+            connect,
+            size=cfg.get('MYSQL_POOL_SIZE', 10),
+            recycle=cfg.get('MYSQL_POOL_RECYCLE', 3600),
+            ping_interval=cfg.get('MYSQL_POOL_PING_INTERVAL', 30),
+            timeout=cfg.get('MYSQL_POOL_TIMEOUT', 10)
+        )
+        app.teardown_appcontext(self.teardown)
+
+    @property
+    def stats(self):
+        if 'db_stats' not in g:
+            g.db_stats = QueryStats()
+        return g.db_stats
+
+    @property
+    def connection(self):
+        if 'db_conn' not in g:
+            conn, created = self.pool.acquire()
+            g.db_conn = (InstrumentedConnection(conn, self.stats), conn, created)
+        return g.db_conn[0]
+
+    def teardown(self, exception):
+        entry = g.pop('db_conn', None)
+        if entry is not None:
+            self.pool.release(entry[1], entry[2])
+
+
+class QueryMetrics:
+    # Per-endpoint totals since the worker started, for /metrics
+
+    def __init__(self, slowest=10):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._slowest = []          # [(ms, endpoint, sql)] worst first
+        self.keep_slowest = slowest
+
+    def record(self, endpoint, stats):
+        ms = stats.seconds * 1000
+        with self._lock:
+            e = self._endpoints.setdefault(endpoint, {
+                "requests": 0, "queries": 0, "db_ms": 0.0, "max_queries": 0
+            })
+            e["requests"] += 1
+            e["queries"] += stats.count
+            e["db_ms"] += ms
+            e["max_queries"] = max(e["max_queries"], stats.count)
+
+            slow_ms, sql = stats.slowest[0] * 1000, stats.slowest[1]
+            if sql and (len(self._slowest) < self.keep_slowest or slow_ms > self._slowest[-1][0]):
+                self._slowest.append((slow_ms, endpoint, sql))
+                self._slowest.sort(key=lambda s: s[0], reverse=True)
+                del self._slowest[self.keep_slowest:]
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {
+                name: dict(e,
+                           db_ms=round(e["db_ms"], 2),
+                           avg_queries=round(e["queries"] / e["requests"], 2),
+                           avg_db_ms=round(e["db_ms"] / e["requests"], 2))
+                for name, e in self._endpoints.items()
+            }
+            slowest = [{"ms": round(ms, 2), "endpoint": ep, "sql": sql}
+                       for ms, ep, sql in self._slowest]
+        return {"endpoints": endpoints, "slowest": slowest}
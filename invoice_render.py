@@ -0,0 +1,122 @@
+import io
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+# -------------------------------------------------
+# INVOICE PDF RENDERER
+# -------------------------------------------------
+# Rows can be any iterable and are drawn as they arrive; the renderer
+# itself keeps no item list. The app feeds it from the invoice read model
+# (invoice_store.InvoiceStore), which has already loaded the items, so a
+# print and its PDF share one cached copy. When a page fills up it gets
+# a page subtotal and the running total is carried to the next page,
+# which starts with the shop/invoice header and column headings again.
+
+SHOP_NAME = "SRI VINAYAGA AUTO PARTS"
+ROW_HEIGHT = 18
+TOP = 140           # first row, measured down from the top edge
+BOTTOM = 100        # room left for the subtotal / total lines
+NAME_WIDTH = 200    # part name column, 120 -> 320
+
+
+def _fit(text, width, font="Helvetica", size=10):
+    text = str(text or '')
+    if stringWidth(text, font, size) <= width:
+        return text
+    while text and stringWidth(text + "...", font, size) > width:
+        text = text[:-1]
+    return text + "..."
+
+
+class _Pages:
+
+    def __init__(self, c, invoice_no, date, shop_name):
+        self.c = c
+        self.shop_name = shop_name
+        self.invoice_no = invoice_no
+        self.date = date
+        self.width, self.height = A4
+        self.page = 0
+        self.y = 0
+
+    def start(self, brought_forward=None):
+        c, width, height = self.c, self.width, self.height
+        self.page += 1
+
+        c.setFont("Helvetica-Bold", 16)
+        c.drawCentredString(width/2, height-40, self.shop_name)
+
+        c.setFont("Helvetica", 10)
+        c.drawString(40, height-80, f"Invoice No : {self.invoice_no}")
+        c.drawString(40, height-95, f"Date : {self.date}")
+        c.drawRightString(550, height-80, f"Page {self.page}")
+
+        c.setFont("Helvetica-Bold", 10)
+        y = height-120
+        c.drawString(40, y, "Part No")
+        c.drawString(120, y, "Description")
+        c.drawRightString(380, y, "Qty")
+        c.drawRightString(450, y, "Rate")
+        c.drawRightString(550, y, "Amount")
+        c.line(40, y-4, 550, y-4)
+        c.setFont("Helvetica", 10)
+
+        self.y = height-TOP
+        if brought_forward is not None:
+            c.drawString(120, self.y, "Brought forward")
+            c.drawRightString(550, self.y, f"{brought_forward:.2f}")
+            self.y -= ROW_HEIGHT
+
+    def full(self):
+        return self.y < BOTTOM
+
+    def subtotal(self, page_total, running_total):
+        c = self.c
+        c.line(380, self.y+12, 550, self.y+12)
+        c.drawString(120, self.y, "Page total")
+        c.drawRightString(550, self.y, f"{page_total:.2f}")
+        c.drawString(120, self.y-14, "Carried forward")
+        c.drawRightString(550, self.y-14, f"{running_total:.2f}")
+        c.showPage()
+
+    def row(self, part_no, name, qty, rate, total):
+        c = self.c
+        c.drawString(40, self.y, _fit(part_no, 75))
+        c.drawString(120, self.y, _fit(name, NAME_WIDTH))
+        c.drawRightString(380, self.y, str(qty))
+        c.drawRightString(450, self.y, f"{rate:.2f}")
+        c.drawRightString(550, self.y, f"{total:.2f}")
+        self.y -= ROW_HEIGHT
+
+
+def render_invoice(invoice_no, created_at, total_amount, rows, shop_name=SHOP_NAME):
+    # rows: iterable of (part_no, part_name, qty, rate, total)
+    # Returns the PDF bytes. invariant=1 keeps the output identical across
+    # renders of the same invoice.
+    out = io.BytesIO()
+    c = canvas.Canvas(out, pagesize=A4, invariant=1)
+    pages = _Pages(c, invoice_no, created_at.strftime('%d-%m-%Y'), shop_name)
+
+    running = 0
+    page_total = 0
+    pages.start()
+    for part_no, name, qty, rate, total in rows:
+        if pages.full():
+            pages.subtotal(page_total, running)
+            pages.start(brought_forward=running)
+            page_total = 0
+        pages.row(part_no, name, qty, rate, total)
+        page_total += float(total)
+        running += float(total)
+
+    if pages.page > 1:
+        c.drawString(120, pages.y, "Page total")
+        c.drawRightString(550, pages.y, f"{page_total:.2f}")
+        pages.y -= ROW_HEIGHT
+
+    c.setFont("Helvetica-Bold", 11)
+    c.drawRightString(550, pages.y-20, f"Total ₹ {total_amount:.2f}")
+    c.save()
+    return out.getvalue()
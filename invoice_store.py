@@ -0,0 +1,72 @@
+from cache import LRUCache
+
+# -------------------------------------------------
+# INVOICE READ MODEL
+# -------------------------------------------------
+# One query fetches the header and items of any number of invoices.
+# Finalized invoices never change, so each one is memoized by invoice_no
+# and shared by the print view, the PDF and bulk "print the day" jobs.
+# One store per company: it only ever loads that company's invoices.
+
+BATCH = 500
+
+
+class InvoiceStore:
+
+    def __init__(self, company_id, maxsize=500):
+        self.company_id = company_id
+        self._cache = LRUCache(maxsize=maxsize)
+
+    def get(self, conn, invoice_no):
+        return self.get_many(conn, [invoice_no]).get(invoice_no)
+
+    def get_many(self, conn, invoice_nos):
+        # -> {invoice_no: invoice} for the invoices that exist
+        found, missing = {}, []
+        for no in invoice_nos:
+            invoice = self._cache.get(no)
+            if invoice is None:
+                missing.append(no)
+            else:
+                found[no] = invoice
+
+        for i in range(0, len(missing), BATCH):
+            for invoice in self._load(conn, missing[i:i + BATCH]):
+                self._cache.set(invoice['no'], invoice)
+                found[invoice['no']] = invoice
+        return found
+
+    def _load(self, conn, invoice_nos):
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT i.invoice_no, i.total_amount, i.created_at,
+                   p.part_no, p.part_name, ii.quantity, ii.price, ii.total
+            FROM invoices i
+            LEFT JOIN invoice_items ii ON ii.invoice_id = i.id
+            LEFT JOIN products p ON p.id = ii.product_id
+            WHERE i.company_id = %s
+              AND i.invoice_no IN ({",".join(["%s"] * len(invoice_nos))})
+            ORDER BY i.id, ii.id
+        """, [self.company_id] + list(invoice_nos))
+        rows = cur.fetchall()
+        cur.close()
+
+        invoices = {}
+        for no, total, created_at, part_no, name, qty, rate, amount in rows:
+            invoice = invoices.get(no)
+            if invoice is None:
+                invoice = invoices[no] = {
+                    "no": no,
+                    "total": total,
+                    "created_at": created_at,
+                    "items": []
+                }
+            if qty is not None:
+                invoice['items'].append({
+                    "part_no": part_no,
+                    "name": name,
+                    "qty": qty,
+                    "rate": rate,
+                    "amount": amount
+                })
+        return invoices.values()
@@ -0,0 +1,141 @@
+from collections import OrderedDict
+from datetime import datetime
+
+from stock_ledger import apply_movements, SALE
+from reporting import record_sales, sales_rows
+
+# -------------------------------------------------
+# SAVE A BILL (ONE TRANSACTION)
+# -------------------------------------------------
+# The whole bill is written in a fixed number of round trips, whatever
+# the number of lines:
+#
+#   1. SELECT ... FOR UPDATE      lock every product on the bill, read stock
+#   2. INSERT invoice_sequences   take the company's next invoice number
+#   3. INSERT invoices
+#   4. INSERT invoice_items       executemany -> one multi-row INSERT
+#   5. UPDATE products            one CASE statement for all stock changes
+#   6. INSERT stock_movements     executemany, one SALE row per product
+#   7. INSERT stock_summary       executemany upsert, see stock_ledger
+#   8. INSERT sales_daily         executemany upsert, see reporting
+#   9. INSERT sales_monthly       executemany upsert
+#  10. COMMIT
+#
+# Rows are locked in id order, and the sequence row always last, so two
+# terminals finalizing overlapping bills wait for each other instead of
+# deadlocking or overselling.
+
+
+class OutOfStock(Exception):
+
+    def __init__(self, shortages):
+        # shortages: [(part_name, wanted, available)]
+        self.shortages = shortages
+        super().__init__(", ".join(
+            f"{name}: need {wanted}, only {available} in stock"
+            for name, wanted, available in shortages
+        ))
+
+
+def _placeholders(n):
+    return ",".join(["%s"] * n)
+
+
+def quantities(items):
+    # one bill can hold the same product on several lines
+    qty = OrderedDict()
+    for i in items:
+        pid = int(i['product_id'])
+        qty[pid] = qty.get(pid, 0) + int(i['qty'])
+    return qty
+
+
+def check_lines(items):
+    # a negative line would pass the stock check and put stock back
+    for i in items:
+        if int(i['qty']) < 1:
+            raise ValueError(f"quantity must be at least 1 (product #{i['product_id']})")
+
+
+def lock_stock(cur, company_id, qty):
+    ids = sorted(qty)
+    # gst and average cost come along for the sales rollups; another
+    # company's product is treated as missing
+    cur.execute(f"""
+        SELECT p.id, p.part_name, p.stock_qty, p.gst_percent,
+               s.purchased_value / NULLIF(s.purchased_qty, 0)
+        FROM products p
+        LEFT JOIN stock_summary s ON s.product_id = p.id
+        WHERE p.id IN ({_placeholders(len(ids))}) AND p.company_id = %s
+        ORDER BY p.id
+        FOR UPDATE
+    """, ids + [company_id])
+    rows = {row[0]: row for row in cur.fetchall()}
+
+    shortages = []
+    for pid, wanted in qty.items():
+        name, available = rows[pid][1:3] if pid in rows else (f"Product #{pid}", 0)
+        if wanted > available:
+            shortages.append((name, wanted, available))
+    if shortages:
+        raise OutOfStock(shortages)
+    return rows
+
+
+def next_invoice_no(cur, company, year):
+    # The counter row stays locked until the bill commits, so numbers are
+    # handed out in commit order and a rolled back bill gives its number
+    # back: no duplicates and no gaps. LAST_INSERT_ID(expr) hands the new
+    # value back with the INSERT, no SELECT needed. Each company has its
+    # own counter, so shops never wait on each other's bills.
+    cur.execute("""
+        INSERT INTO invoice_sequences (company_id, year, last_no)
+        VALUES (%s, %s, LAST_INSERT_ID(1))
+        ON DUPLICATE KEY UPDATE last_no = LAST_INSERT_ID(last_no + 1)
+    """, (company['id'], year))
+    return f"{company['code']}-{year}-{str(cur.lastrowid).zfill(4)}"
+
+
+def save_invoice(conn, company, items, created_at=None):
+    # company: {"id", "code"}; the code prefixes the invoice number.
+    # Raises ValueError for a line with qty < 1, OutOfStock for shortages.
+    check_lines(items)
+    qty = quantities(items)
+    total_amount = sum(float(i['total']) for i in items)
+    created_at = created_at or datetime.now()
+
+    cur = conn.cursor()
+    try:
+        products = lock_stock(cur, company['id'], qty)
+        invoice_no = next_invoice_no(cur, company, created_at.year)
+
+        cur.execute("""
+            INSERT INTO invoices (company_id, invoice_no, total_amount, created_at)
+            VALUES (%s,%s,%s,%s)
+        """, (company['id'], invoice_no, total_amount, created_at))
+        invoice_id = cur.lastrowid
+
+        cur.executemany("""
+            INSERT INTO invoice_items
+            (invoice_id, product_id, quantity, price, total)
+            VALUES (%s,%s,%s,%s,%s)
+        """, [
+            (invoice_id, i['product_id'], i['qty'], i['price'], i['total'])
+            for i in items
+        ])
+
+        apply_movements(cur, SALE, {pid: (-q, None) for pid, q in qty.items()},
+                        invoice_no, created_at)
+        record_sales(cur, company['id'], created_at, sales_rows(
+            items,
+            costs={pid: row[4] for pid, row in products.items()},
+            gst={pid: row[3] for pid, row in products.items()}
+        ))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+    return invoice_id, invoice_no
@@ -0,0 +1,370 @@
+import csv
+import json
+import multiprocessing
+import os
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+import MySQLdb
+import MySQLdb.cursors
+
+import config
+from companies import get_company, pdf_dir
+from invoice_render import render_invoice
+from invoice_store import InvoiceStore
+from pdf_cache import InvoicePdfCache
+from reporting import gst_summary
+
+# -------------------------------------------------
+# END-OF-DAY JOB QUEUE
+# -------------------------------------------------
+# Long batch work (a day's invoice PDFs, GST summary, reorder list,
+# voucher export) runs in a local process pool instead of in a request
+# handler. The jobs table is the queue and the status board:
+#
+#   queued -> running -> done | failed
+#
+# submit() inserts the row and hands the id to the pool; the worker
+# process opens its own MySQL connection, claims the row (so a job is
+# never run twice) and reads its data in CHUNK-row pieces. CSV output
+# goes to config.JOB_OUTPUT_DIR; the row keeps the file name, counts and
+# progress so GET /jobs/<id> never talks to the worker. Every job belongs
+# to the company it was submitted for and only reads that company's rows.
+#
+# Workers are spawned, not forked, so they do not inherit the web
+# process's threads or open connections.
+#
+# While a job runs, its worker holds a MySQL named lock (lock_name) on
+# its status connection. If the worker process dies, MySQL drops the
+# lock with the connection, so a 'running' row whose lock is free has
+# lost its worker; fail_orphans() marks such rows failed when a queue
+# (re)starts its pool.
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+CHUNK = 500
+
+
+def connect():
+    return MySQLdb.connect(host=config.MYSQL_HOST, user=config.MYSQL_USER,
+                           passwd=config.MYSQL_PASSWORD, db=config.MYSQL_DB,
+                           charset='utf8mb4')
+
+
+def lock_name(job_id):
+    return f"jobs:{config.MYSQL_DB}:{job_id}"
+
+
+def _day(value):
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else date.today()
+
+
+def _write_csv(path, header, cur, progress):
+    # cur: executed server-side cursor; rows are written CHUNK at a time
+    tmp = f"{path}.tmp"
+    count = 0
+    with open(tmp, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        while True:
+            rows = cur.fetchmany(CHUNK)
+            if not rows:
+                break
+            writer.writerows(rows)
+            count += len(rows)
+            progress(count)
+    os.replace(tmp, path)
+    return count
+
+
+# -------------------------------------------------
+# JOB KINDS
+# -------------------------------------------------
+# Each kind has a params check (run at submit time, raises ValueError)
+# and a body: body(conn, company_id, params, out_path, progress) -> result dict.
+
+def day_params(params):
+    return {"date": _day(params.get('date')).isoformat()}
+
+
+def range_params(params):
+    end = _day(params.get('to'))
+    start = _day(params.get('from')) if params.get('from') else end.replace(day=1)
+    if start > end:
+        raise ValueError("from is after to")
+    return {"from": start.isoformat(), "to": end.isoformat()}
+
+
+def no_params(params):
+    return {}
+
+
+def invoice_pdfs(conn, company_id, params, out, progress):
+    # render every invoice of the day into the PDF cache; invoices that
+    # already have a PDF are skipped (output is deterministic anyway)
+    start = _day(params['date'])
+    start = datetime.combine(start, datetime.min.time())
+    end = start + timedelta(days=1)
+
+    cur = conn.cursor()
+    shop_name = get_company(cur, company_id)['name']
+    store = InvoiceStore(company_id, maxsize=CHUNK)
+    batch = {}
+
+    def render(invoice_no):
+        invoice = batch.get(invoice_no)
+        if not invoice:
+            return None
+        rows = ((i['part_no'], i['name'], i['qty'], i['rate'], i['amount']) for i in invoice['items'])
+        return render_invoice(invoice_no, invoice['created_at'], invoice['total'], rows, shop_name)
+
+    # pool processes are long-lived: the cache's render thread must not
+    # outlive the job
+    pdfs = InvoicePdfCache(pdf_dir(company_id), render, workers=1)
+
+    last, done = (start, 0), 0
+    try:
+        while True:
+            cur.execute("""
+                SELECT invoice_no, created_at, id
+                FROM invoices
+                WHERE company_id = %s AND created_at < %s AND (created_at, id) > (%s, %s)
+                ORDER BY created_at, id
+                LIMIT %s
+            """, (company_id, end, last[0], last[1], CHUNK))
+            rows = cur.fetchall()
+            if not rows:
+                break
+            batch.clear()
+            batch.update(store.get_many(conn, [r[0] for r in rows]))
+            for invoice_no in batch:
+                pdfs.get(invoice_no)
+            done += len(rows)
+            progress(done)
+            last = (rows[-1][1], rows[-1][2])
+    finally:
+        pdfs.close()
+        cur.close()
+    return {"invoices": done}
+
+
+def gst_summary_job(conn, company_id, params, out, progress):
+    cur = conn.cursor()
+    rows = gst_summary(cur, company_id, _day(params['from']), _day(params['to']))
+    cur.close()
+    with open(out, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["gst_percent", "qty", "revenue"])
+        writer.writerows(rows)
+    progress(len(rows))
+    return {"file": os.path.basename(out), "rows": len(rows),
+            "summary": [[str(g), int(q or 0), str(r)] for g, q, r in rows]}
+
+
+def reorder_list(conn, company_id, params, out, progress):
+    # same rule as the LOW STOCK label: stock_qty <= min_stock
+    cur = conn.cursor(MySQLdb.cursors.SSCursor)
+    cur.execute("""
+        SELECT p.part_no, p.part_name, p.stock_qty, p.min_stock,
+               p.min_stock - p.stock_qty,
+               ROUND(s.purchased_value / NULLIF(s.purchased_qty, 0), 2)
+        FROM products p
+        LEFT JOIN stock_summary s ON s.product_id = p.id
+        WHERE p.company_id = %s AND p.low_stock = 1
+        ORDER BY p.part_name, p.id
+    """, (company_id,))
+    try:
+        count = _write_csv(out, ["part_no", "part_name", "stock_qty", "min_stock",
+                                 "shortfall", "avg_cost"], cur, progress)
+    finally:
+        cur.close()
+    return {"file": os.path.basename(out), "rows": count}
+
+
+def voucher_export(conn, company_id, params, out, progress):
+    # one sales voucher line per invoice and GST rate, for the accounts
+    start = datetime.combine(_day(params['date']), datetime.min.time())
+    cur = conn.cursor(MySQLdb.cursors.SSCursor)
+    cur.execute("""
+        SELECT DATE(i.created_at), 'Sales', i.invoice_no, p.gst_percent,
+               SUM(ii.quantity), SUM(ii.total)
+        FROM invoices i
+        JOIN invoice_items ii ON ii.invoice_id = i.id
+        JOIN products p ON p.id = ii.product_id
+        WHERE i.company_id = %s AND i.created_at >= %s AND i.created_at < %s
+        GROUP BY i.id, i.invoice_no, DATE(i.created_at), p.gst_percent
+        ORDER BY i.id, p.gst_percent
+    """, (company_id, start, start + timedelta(days=1)))
+    try:
+        count = _write_csv(out, ["date", "voucher_type", "voucher_no", "gst_percent",
+                                 "qty", "amount"], cur, progress)
+    finally:
+        cur.close()
+    return {"file": os.path.basename(out), "rows": count}
+
+
+KINDS = {
+    'invoice_pdfs': (day_params, invoice_pdfs),
+    'gst_summary': (range_params, gst_summary_job),
+    'reorder_list': (no_params, reorder_list),
+    'voucher_export': (day_params, voucher_export),
+}
+
+
+# -------------------------------------------------
+# WORKER
+# -------------------------------------------------
+def run(job_id):
+    # runs in a pool process; status goes through its own connection so
+    # progress can be written while a server-side cursor is streaming
+    conn, status = connect(), connect()
+    cur = status.cursor()
+    try:
+        # taken before the claim and held until status closes
+        cur.execute("SELECT GET_LOCK(%s, 0)", (lock_name(job_id),))
+        if cur.fetchone()[0] != 1:
+            return      # another process is running it
+        cur.execute("""
+            UPDATE jobs SET status = %s, started_at = NOW()
+            WHERE id = %s AND status = %s
+        """, (RUNNING, job_id, QUEUED))
+        status.commit()
+        if cur.rowcount == 0:
+            return      # claimed by another process, or gone
+        cur.execute("SELECT company_id, kind, params FROM jobs WHERE id = %s", (job_id,))
+        company_id, kind, params = cur.fetchone()
+
+        def progress(n):
+            cur.execute("UPDATE jobs SET progress = %s WHERE id = %s", (n, job_id))
+            status.commit()
+
+        os.makedirs(config.JOB_OUTPUT_DIR, exist_ok=True)
+        out = os.path.join(config.JOB_OUTPUT_DIR, f"job-{job_id}-{kind}.csv")
+        result = KINDS[kind][1](conn, company_id, json.loads(params), out, progress)
+        cur.execute("""
+            UPDATE jobs SET status = %s, result = %s, finished_at = NOW()
+            WHERE id = %s
+        """, (DONE, json.dumps(result), job_id))
+    except Exception:
+        cur.execute("""
+            UPDATE jobs SET status = %s, error = %s, finished_at = NOW()
+            WHERE id = %s
+        """, (FAILED, traceback.format_exc()[-2000:], job_id))
+    finally:
+        status.commit()
+        cur.close()
+        status.close()
+        conn.close()
+
+
+# -------------------------------------------------
+# QUEUE (WEB PROCESS SIDE)
+# -------------------------------------------------
+def fail_orphans(cur):
+    # running rows whose worker is gone (see lock_name)
+    cur.execute("SELECT id FROM jobs WHERE status = %s", (RUNNING,))
+    for (job_id,) in cur.fetchall():
+        cur.execute("SELECT IS_FREE_LOCK(%s)", (lock_name(job_id),))
+        if cur.fetchone()[0] == 1:
+            cur.execute("""
+                UPDATE jobs SET status = %s, error = %s, finished_at = NOW()
+                WHERE id = %s AND status = %s
+            """, (FAILED, "worker process stopped while the job was running",
+                  job_id, RUNNING))
+
+
+class JobQueue:
+
+    def __init__(self, workers=2):
+        self.workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self, conn):
+        # started on first use (and again after a worker process died);
+        # fails jobs orphaned by a dead worker and picks up jobs still
+        # queued from before a restart
+        with self._lock:
+            if self._pool is not None:
+                return self._pool
+            pool = self._pool = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context('spawn'))
+        cur = conn.cursor()
+        fail_orphans(cur)
+        conn.commit()
+        cur.execute("SELECT id FROM jobs WHERE status = %s ORDER BY id", (QUEUED,))
+        for (job_id,) in cur.fetchall():
+            self._run(pool, job_id)
+        cur.close()
+        return pool
+
+    def _run(self, pool, job_id):
+        pool.submit(run, job_id).add_done_callback(lambda f: self._done(pool, f))
+
+    def _done(self, pool, future):
+        # run() records its own errors, so a failed future means the pool
+        # lost a process (BrokenProcessPool) and takes no more work:
+        # replace it, which also fails the orphaned job
+        if future.cancelled() or future.exception() is None:
+            return
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+        pool.shutdown(wait=False)
+        conn = connect()
+        try:
+            self._executor(conn)
+        finally:
+            conn.close()
+
+    def submit(self, conn, company_id, kind, params=None):
+        # -> job id; raises ValueError for an unknown kind or bad params
+        if kind not in KINDS:
+            raise ValueError(f"unknown job kind {kind!r}")
+        params = KINDS[kind][0](params or {})
+
+        pool = self._executor(conn)
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO jobs (company_id, kind, params, status, created_at)
+            VALUES (%s,%s,%s,%s,NOW())
+        """, (company_id, kind, json.dumps(params), QUEUED))
+        job_id = cur.lastrowid
+        conn.commit()
+        cur.close()
+
+        self._run(pool, job_id)
+        return job_id
+
+    @staticmethod
+    def get(conn, company_id, job_id):
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT id, kind, params, status, progress, result, error,
+                   created_at, started_at, finished_at
+            FROM jobs WHERE id = %s AND company_id = %s
+        """, (job_id, company_id))
+        row = cur.fetchone()
+        cur.close()
+        if not row:
+            return None
+
+        job_id, kind, params, state, progress, result, error, created, started, finished = row
+        return {
+            "id": job_id,
+            "kind": kind,
+            "params": json.loads(params),
+            "status": state,
+            "progress": progress,
+            "result": json.loads(result) if result else None,
+            "error": error,
+            "created_at": created.isoformat(),
+            "started_at": started.isoformat() if started else None,
+            "finished_at": finished.isoformat() if finished else None,
+        }
@@ -0,0 +1,28 @@
+-- Per-year invoice counter replacing the "ORDER BY id DESC LIMIT 1" lookup.
+--
+-- The old generator could hand out the same number twice, and this adds a
+-- unique key on invoice_no. Resolve any duplicates before running this;
+-- they are printed bills, so decide case by case which one to renumber:
+--
+--   SELECT invoice_no, COUNT(*), GROUP_CONCAT(id ORDER BY id)
+--   FROM invoices
+--   GROUP BY invoice_no
+--   HAVING COUNT(*) > 1;
+--
+-- The key is added first, so if duplicates are left the migration stops
+-- before changing anything else and can simply be run again.
+
+ALTER TABLE invoices ADD UNIQUE KEY uq_invoices_invoice_no (invoice_no);
+
+CREATE TABLE IF NOT EXISTS invoice_sequences (
+    year SMALLINT NOT NULL PRIMARY KEY,
+    last_no INT NOT NULL
+);
+
+-- carry on from the numbers already issued (SV-YYYY-####)
+INSERT IGNORE INTO invoice_sequences (year, last_no)
+SELECT CAST(SUBSTRING_INDEX(SUBSTRING_INDEX(invoice_no, '-', 2), '-', -1) AS UNSIGNED),
+       MAX(CAST(SUBSTRING_INDEX(invoice_no, '-', -1) AS UNSIGNED))
+FROM invoices
+WHERE invoice_no LIKE 'SV-%'
+GROUP BY 1;
@@ -0,0 +1,3 @@
+-- Keyset pagination for /invoice-list walks invoices newest first.
+
+ALTER TABLE invoices ADD KEY idx_invoices_created (created_at, id);
@@ -0,0 +1,48 @@
+-- Stock movement ledger, stock summary and purchase entry.
+
+-- append-only record of every stock change (see stock_ledger.py)
+CREATE TABLE IF NOT EXISTS stock_movements (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    product_id INT NOT NULL,
+    movement_type ENUM('SALE', 'PURCHASE', 'ADJUST') NOT NULL,
+    qty_change INT NOT NULL,
+    unit_cost DECIMAL(10,2),
+    ref VARCHAR(50),
+    created_at DATETIME NOT NULL,
+    KEY idx_stock_movements_product (product_id, id)
+);
+
+-- running totals per product, maintained with every movement
+CREATE TABLE IF NOT EXISTS stock_summary (
+    product_id INT NOT NULL PRIMARY KEY,
+    stock_qty INT NOT NULL DEFAULT 0,
+    purchased_qty INT NOT NULL DEFAULT 0,
+    purchased_value DECIMAL(14,2) NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS purchases (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    supplier VARCHAR(100),
+    bill_no VARCHAR(50),
+    total_amount DECIMAL(12,2) NOT NULL,
+    created_at DATETIME NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS purchase_items (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    purchase_id INT NOT NULL,
+    product_id INT NOT NULL,
+    quantity INT NOT NULL,
+    rate DECIMAL(10,2) NOT NULL,
+    KEY idx_purchase_items_purchase (purchase_id)
+);
+
+-- open the ledger with each product's current stock
+INSERT INTO stock_movements (product_id, movement_type, qty_change, ref, created_at)
+SELECT id, 'ADJUST', stock_qty, 'OPENING', NOW()
+FROM products;
+
+INSERT INTO stock_summary (product_id, stock_qty, updated_at)
+SELECT id, stock_qty, NOW()
+FROM products;
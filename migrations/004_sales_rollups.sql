@@ -0,0 +1,23 @@
+-- Daily / monthly sales rollups for /reports and /profit-report.
+-- Then fill them for past invoices:
+--   python reporting.py <first-invoice-date> <today>      (YYYY-MM-DD)
+
+CREATE TABLE IF NOT EXISTS sales_daily (
+    period DATE NOT NULL,
+    product_id INT NOT NULL,
+    gst_percent DECIMAL(5,2) NOT NULL,
+    qty INT NOT NULL,
+    revenue DECIMAL(14,2) NOT NULL,
+    cost DECIMAL(14,2) NOT NULL,
+    PRIMARY KEY (period, product_id, gst_percent)
+);
+
+CREATE TABLE IF NOT EXISTS sales_monthly (
+    period DATE NOT NULL,
+    product_id INT NOT NULL,
+    gst_percent DECIMAL(5,2) NOT NULL,
+    qty INT NOT NULL,
+    revenue DECIMAL(14,2) NOT NULL,
+    cost DECIMAL(14,2) NOT NULL,
+    PRIMARY KEY (period, product_id, gst_percent)
+);
@@ -0,0 +1,8 @@
+-- Bulk price-list import upserts on part_no / barcode.
+-- Resolve any duplicate part numbers or barcodes before running this.
+
+UPDATE products SET barcode = NULL WHERE barcode = '';
+
+ALTER TABLE products
+    ADD UNIQUE KEY uq_products_part_no (part_no),
+    ADD UNIQUE KEY uq_products_barcode (barcode);
@@ -0,0 +1,7 @@
+-- Keyset pages on /products and the low-stock filter.
+-- low_stock follows the LOW STOCK label on the page: stock_qty <= min_stock.
+
+ALTER TABLE products
+    ADD COLUMN low_stock TINYINT(1) AS (stock_qty <= min_stock) STORED,
+    ADD KEY idx_products_name (part_name, id),
+    ADD KEY idx_products_low_stock (low_stock, part_name, id);
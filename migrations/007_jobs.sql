@@ -0,0 +1,15 @@
+-- End-of-day job queue (see jobs.py).
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    kind VARCHAR(30) NOT NULL,
+    params TEXT NOT NULL,
+    status ENUM('queued', 'running', 'done', 'failed') NOT NULL,
+    progress INT NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at DATETIME NOT NULL,
+    started_at DATETIME,
+    finished_at DATETIME,
+    KEY idx_jobs_status (status, id)
+);
@@ -0,0 +1,61 @@
+-- Multi-company: every shop's rows carry company_id and every index
+-- leads with it. Existing data becomes company 1 (code SV), so its
+-- invoice numbers (SV-YYYY-####) carry on unchanged.
+
+CREATE TABLE IF NOT EXISTS companies (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    code VARCHAR(10) NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    period_from DATE,
+    period_to DATE,
+    UNIQUE KEY uq_companies_code (code)
+);
+
+INSERT IGNORE INTO companies (id, code, name) VALUES (1, 'SV', 'SRI VINAYAGA AUTO PARTS');
+
+ALTER TABLE products
+    ADD COLUMN company_id INT NOT NULL DEFAULT 1 AFTER id,
+    DROP KEY uq_products_part_no,
+    DROP KEY uq_products_barcode,
+    DROP KEY idx_products_name,
+    DROP KEY idx_products_low_stock,
+    ADD UNIQUE KEY uq_products_part_no (company_id, part_no),
+    ADD UNIQUE KEY uq_products_barcode (company_id, barcode),
+    ADD KEY idx_products_name (company_id, part_name, id),
+    ADD KEY idx_products_low_stock (company_id, low_stock, part_name, id);
+
+ALTER TABLE invoices
+    ADD COLUMN company_id INT NOT NULL DEFAULT 1 AFTER id,
+    DROP KEY idx_invoices_created,
+    ADD KEY idx_invoices_created (company_id, created_at, id);
+
+ALTER TABLE invoice_sequences
+    ADD COLUMN company_id INT NOT NULL DEFAULT 1 FIRST,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (company_id, year);
+
+ALTER TABLE purchases
+    ADD COLUMN company_id INT NOT NULL DEFAULT 1 AFTER id,
+    ADD KEY idx_purchases_created (company_id, created_at);
+
+ALTER TABLE sales_daily
+    ADD COLUMN company_id INT NOT NULL DEFAULT 1 FIRST,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (company_id, period, product_id, gst_percent);
+
+ALTER TABLE sales_monthly
+    ADD COLUMN company_id INT NOT NULL DEFAULT 1 FIRST,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (company_id, period, product_id, gst_percent);
+
+ALTER TABLE jobs
+    ADD COLUMN company_id INT NOT NULL DEFAULT 1 AFTER id;
+
+-- the app always writes company_id; drop the defaults used to backfill
+ALTER TABLE products ALTER COLUMN company_id DROP DEFAULT;
+ALTER TABLE invoices ALTER COLUMN company_id DROP DEFAULT;
+ALTER TABLE invoice_sequences ALTER COLUMN company_id DROP DEFAULT;
+ALTER TABLE purchases ALTER COLUMN company_id DROP DEFAULT;
+ALTER TABLE sales_daily ALTER COLUMN company_id DROP DEFAULT;
+ALTER TABLE sales_monthly ALTER COLUMN company_id DROP DEFAULT;
+ALTER TABLE jobs ALTER COLUMN company_id DROP DEFAULT;
@@ -0,0 +1,113 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# -------------------------------------------------
+# INVOICE PDF CACHE
+# -------------------------------------------------
+# Finalized invoices never change, so each PDF is rendered once and kept:
+#
+#   <directory>/<sha256>.pdf        the PDF, named after its own content
+#   <directory>/refs/<invoice_no>   sha256 of that invoice's PDF
+#
+# The sha256 doubles as the ETag. Repeat downloads only read the ref file
+# (or the in-memory copy of it) and never touch MySQL or reportlab.
+#
+# prerender() renders on a background thread right after a bill is saved;
+# a download that arrives while that render is running waits for it
+# instead of starting a second one.
+
+SAFE_NAME = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+class InvoicePdfCache:
+
+    def __init__(self, directory, render, workers=2):
+        # render(invoice_no) returns the PDF bytes, or None if the invoice
+        # does not exist
+        self.directory = os.path.abspath(directory)
+        self.render = render
+        self._refs = {}
+        self._pending = {}
+        self._lock = threading.RLock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='invoice-pdf')
+        os.makedirs(os.path.join(directory, 'refs'), exist_ok=True)
+
+    def _blob(self, digest):
+        return os.path.join(self.directory, f"{digest}.pdf")
+
+    def _ref(self, invoice_no):
+        return os.path.join(self.directory, 'refs', invoice_no)
+
+    def etag(self, invoice_no):
+        digest = self._refs.get(invoice_no)
+        if digest is None:
+            try:
+                with open(self._ref(invoice_no)) as f:
+                    digest = f.read().strip()
+            except FileNotFoundError:
+                return None
+            self._refs[invoice_no] = digest
+        return digest
+
+    def get(self, invoice_no):
+        # -> (path, etag), or (None, None) for an unknown invoice
+        if not SAFE_NAME.match(invoice_no):
+            return None, None
+
+        digest = self.etag(invoice_no)
+        if digest and os.path.exists(self._blob(digest)):
+            return self._blob(digest), digest
+
+        digest = self._submit(invoice_no).result()
+        if digest is None:
+            return None, None
+        return self._blob(digest), digest
+
+    def close(self):
+        # for short-lived caches (e.g. a batch job); waits for pending renders
+        self._pool.shutdown(wait=True)
+
+    def prerender(self, invoice_no):
+        if SAFE_NAME.match(invoice_no):
+            self._submit(invoice_no)
+
+    def _submit(self, invoice_no):
+        with self._lock:
+            future = self._pending.get(invoice_no)
+            if future is None:
+                future = self._pool.submit(self._build, invoice_no)
+                self._pending[invoice_no] = future
+                future.add_done_callback(lambda _: self._forget(invoice_no))
+            return future
+
+    def _forget(self, invoice_no):
+        with self._lock:
+            self._pending.pop(invoice_no, None)
+
+    def _build(self, invoice_no):
+        data = self.render(invoice_no)
+        if data is None:
+            return None
+
+        digest = hashlib.sha256(data).hexdigest()
+        blob = self._blob(digest)
+        if not os.path.exists(blob):
+            fd, tmp = tempfile.mkstemp(suffix='.pdf', dir=self.directory)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, blob)
+
+        self._write_ref(invoice_no, digest)
+        self._refs[invoice_no] = digest
+        return digest
+
+    def _write_ref(self, invoice_no, digest):
+        ref = self._ref(invoice_no)
+        tmp = f"{ref}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(digest)
+        os.replace(tmp, ref)
@@ -0,0 +1,153 @@
+from collections import OrderedDict
+from datetime import date, timedelta
+
+# -------------------------------------------------
+# SALES / PROFIT ROLLUPS
+# -------------------------------------------------
+# sales_daily and sales_monthly hold qty, revenue and cost per
+# (company, period, product, GST rate). Every saved bill adds to both inside its
+# own transaction, so reports read a bounded number of rollup rows and
+# never scan invoices / invoice_items.
+#
+# Cost is the product's average purchase cost (stock_summary) at the
+# time of sale; products never purchased through the app count as zero
+# cost.
+
+
+def _month(day):
+    return day.replace(day=1)
+
+
+def sales_rows(lines, costs, gst):
+    # lines: bill items; costs / gst: {product_id: avg cost / gst %}
+    # -> {(product_id, gst_percent): [qty, revenue, cost]}
+    rows = OrderedDict()
+    for i in lines:
+        pid = int(i['product_id'])
+        key = (pid, gst.get(pid, 0))
+        row = rows.setdefault(key, [0, 0.0, 0.0])
+        row[0] += int(i['qty'])
+        row[1] += float(i['total'])
+        row[2] += int(i['qty']) * float(costs.get(pid) or 0)
+    return rows
+
+
+def record_sales(cur, company_id, sold_at, rows):
+    # two statements whatever the bill size; the caller commits
+    day = sold_at.date()
+    for table, period in (("sales_daily", day), ("sales_monthly", _month(day))):
+        cur.executemany(f"""
+            INSERT INTO {table}
+            (company_id, period, product_id, gst_percent, qty, revenue, cost)
+            VALUES (%s,%s,%s,%s,%s,%s,%s)
+            ON DUPLICATE KEY UPDATE
+                qty = qty + VALUES(qty),
+                revenue = revenue + VALUES(revenue),
+                cost = cost + VALUES(cost)
+        """, [(company_id, period, pid, gst_percent, qty, revenue, cost)
+              for (pid, gst_percent), (qty, revenue, cost) in rows.items()])
+
+
+# -------------------------------------------------
+# BACKFILL
+# -------------------------------------------------
+def backfill(conn, start, end, progress=None):
+    # Rebuild the rollups for [start, end] from invoices, one month per
+    # transaction, for every company. Uses today's average cost for every
+    # sale.
+    cur = conn.cursor()
+    month = _month(start)
+    while month <= end:
+        next_month = (month + timedelta(days=32)).replace(day=1)
+
+        cur.execute("DELETE FROM sales_daily WHERE period >= %s AND period < %s",
+                    (month, next_month))
+        cur.execute("""
+            INSERT INTO sales_daily
+            (company_id, period, product_id, gst_percent, qty, revenue, cost)
+            SELECT i.company_id, DATE(i.created_at), ii.product_id, p.gst_percent,
+                   SUM(ii.quantity), SUM(ii.total),
+                   SUM(ii.quantity * COALESCE(s.purchased_value / NULLIF(s.purchased_qty, 0), 0))
+            FROM invoices i
+            JOIN invoice_items ii ON ii.invoice_id = i.id
+            JOIN products p ON p.id = ii.product_id
+            LEFT JOIN stock_summary s ON s.product_id = ii.product_id
+            WHERE i.created_at >= %s AND i.created_at < %s
+            GROUP BY i.company_id, DATE(i.created_at), ii.product_id, p.gst_percent
+        """, (month, next_month))
+
+        cur.execute("DELETE FROM sales_monthly WHERE period = %s", (month,))
+        cur.execute("""
+            INSERT INTO sales_monthly
+            (company_id, period, product_id, gst_percent, qty, revenue, cost)
+            SELECT company_id, %s, product_id, gst_percent, SUM(qty), SUM(revenue), SUM(cost)
+            FROM sales_daily
+            WHERE period >= %s AND period < %s
+            GROUP BY company_id, product_id, gst_percent
+        """, (month, month, next_month))
+
+        conn.commit()
+        if progress:
+            progress(month)
+        month = next_month
+    cur.close()
+
+
+# -------------------------------------------------
+# REPORT QUERIES
+# -------------------------------------------------
+def daily_sales(cur, company_id, start, end):
+    # [(date, revenue)] newest first
+    cur.execute("""
+        SELECT period, SUM(revenue)
+        FROM sales_daily
+        WHERE company_id = %s AND period BETWEEN %s AND %s
+        GROUP BY period
+        ORDER BY period DESC
+    """, (company_id, start, end))
+    return cur.fetchall()
+
+
+def gst_summary(cur, company_id, start, end):
+    # [(gst_percent, qty, revenue)]
+    cur.execute("""
+        SELECT gst_percent, SUM(qty), SUM(revenue)
+        FROM sales_daily
+        WHERE company_id = %s AND period BETWEEN %s AND %s
+        GROUP BY gst_percent
+        ORDER BY gst_percent
+    """, (company_id, start, end))
+    return cur.fetchall()
+
+
+def monthly_profit(cur, company_id, month):
+    # [(part_name, qty, cost, revenue, profit)] best first
+    cur.execute("""
+        SELECT p.part_name, SUM(m.qty), SUM(m.cost), SUM(m.revenue),
+               SUM(m.revenue) - SUM(m.cost) AS profit
+        FROM sales_monthly m
+        JOIN products p ON p.id = m.product_id
+        WHERE m.company_id = %s AND m.period = %s
+        GROUP BY m.product_id, p.part_name
+        ORDER BY profit DESC
+    """, (company_id, _month(month)))
+    return cur.fetchall()
+
+
+def default_range(days=30):
+    end = date.today()
+    return end - timedelta(days=days - 1), end
+
+
+if __name__ == '__main__':
+    # python reporting.py 2024-01-01 2026-12-31   -> backfill that range
+    import sys
+    from datetime import datetime
+
+    import MySQLdb
+    import config
+
+    start, end = (datetime.strptime(d, '%Y-%m-%d').date() for d in sys.argv[1:3])
+    conn = MySQLdb.connect(host=config.MYSQL_HOST, user=config.MYSQL_USER,
+                           passwd=config.MYSQL_PASSWORD, db=config.MYSQL_DB)
+    backfill(conn, start, end, progress=lambda m: print(f"{m:%Y-%m} done"))
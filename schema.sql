@@ -0,0 +1,148 @@
+-- -------------------------------------------------
+-- bike_billing schema (MySQL 8)
+-- -------------------------------------------------
+-- Full schema for a fresh install. Existing databases: apply the
+-- files in migrations/ in order instead.
+
+CREATE TABLE IF NOT EXISTS users (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    username VARCHAR(50) NOT NULL UNIQUE,
+    password_hash VARCHAR(255) NOT NULL
+);
+
+-- one row per shop; every shop's data carries its company_id (see companies.py)
+CREATE TABLE IF NOT EXISTS companies (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    code VARCHAR(10) NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    period_from DATE,
+    period_to DATE,
+    UNIQUE KEY uq_companies_code (code)
+);
+
+INSERT IGNORE INTO companies (id, code, name) VALUES (1, 'SV', 'SRI VINAYAGA AUTO PARTS');
+
+CREATE TABLE IF NOT EXISTS products (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    company_id INT NOT NULL,
+    part_no VARCHAR(50) NOT NULL,
+    barcode VARCHAR(50),
+    part_name VARCHAR(200) NOT NULL,
+    mrp DECIMAL(10,2) NOT NULL DEFAULT 0,
+    sell_price DECIMAL(10,2) NOT NULL DEFAULT 0,
+    stock_qty INT NOT NULL DEFAULT 0,
+    min_stock INT NOT NULL DEFAULT 0,
+    gst_percent DECIMAL(5,2) NOT NULL DEFAULT 0,
+    low_stock TINYINT(1) AS (stock_qty <= min_stock) STORED,
+    UNIQUE KEY uq_products_part_no (company_id, part_no),
+    UNIQUE KEY uq_products_barcode (company_id, barcode),
+    KEY idx_products_name (company_id, part_name, id),
+    KEY idx_products_low_stock (company_id, low_stock, part_name, id)
+);
+
+CREATE TABLE IF NOT EXISTS invoices (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    company_id INT NOT NULL,
+    invoice_no VARCHAR(30) NOT NULL,
+    total_amount DECIMAL(12,2) NOT NULL,
+    created_at DATETIME NOT NULL,
+    UNIQUE KEY uq_invoices_invoice_no (invoice_no),
+    KEY idx_invoices_created (company_id, created_at, id)
+);
+
+CREATE TABLE IF NOT EXISTS invoice_items (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    invoice_id INT NOT NULL,
+    product_id INT NOT NULL,
+    quantity INT NOT NULL,
+    price DECIMAL(10,2) NOT NULL,
+    total DECIMAL(12,2) NOT NULL,
+    KEY idx_invoice_items_invoice (invoice_id)
+);
+
+-- last invoice number handed out per company and year (see invoicing.next_invoice_no)
+CREATE TABLE IF NOT EXISTS invoice_sequences (
+    company_id INT NOT NULL,
+    year SMALLINT NOT NULL,
+    last_no INT NOT NULL,
+    PRIMARY KEY (company_id, year)
+);
+
+-- append-only record of every stock change (see stock_ledger.py)
+CREATE TABLE IF NOT EXISTS stock_movements (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    product_id INT NOT NULL,
+    movement_type ENUM('SALE', 'PURCHASE', 'ADJUST') NOT NULL,
+    qty_change INT NOT NULL,
+    unit_cost DECIMAL(10,2),
+    ref VARCHAR(50),
+    created_at DATETIME NOT NULL,
+    KEY idx_stock_movements_product (product_id, id)
+);
+
+-- running totals per product, maintained with every movement
+CREATE TABLE IF NOT EXISTS stock_summary (
+    product_id INT NOT NULL PRIMARY KEY,
+    stock_qty INT NOT NULL DEFAULT 0,
+    purchased_qty INT NOT NULL DEFAULT 0,
+    purchased_value DECIMAL(14,2) NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS purchases (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    company_id INT NOT NULL,
+    supplier VARCHAR(100),
+    bill_no VARCHAR(50),
+    total_amount DECIMAL(12,2) NOT NULL,
+    created_at DATETIME NOT NULL,
+    KEY idx_purchases_created (company_id, created_at)
+);
+
+CREATE TABLE IF NOT EXISTS purchase_items (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    purchase_id INT NOT NULL,
+    product_id INT NOT NULL,
+    quantity INT NOT NULL,
+    rate DECIMAL(10,2) NOT NULL,
+    KEY idx_purchase_items_purchase (purchase_id)
+);
+
+-- sales rollups per company / period / product / GST rate (see reporting.py)
+CREATE TABLE IF NOT EXISTS sales_daily (
+    company_id INT NOT NULL,
+    period DATE NOT NULL,
+    product_id INT NOT NULL,
+    gst_percent DECIMAL(5,2) NOT NULL,
+    qty INT NOT NULL,
+    revenue DECIMAL(14,2) NOT NULL,
+    cost DECIMAL(14,2) NOT NULL,
+    PRIMARY KEY (company_id, period, product_id, gst_percent)
+);
+
+CREATE TABLE IF NOT EXISTS sales_monthly (
+    company_id INT NOT NULL,
+    period DATE NOT NULL,
+    product_id INT NOT NULL,
+    gst_percent DECIMAL(5,2) NOT NULL,
+    qty INT NOT NULL,
+    revenue DECIMAL(14,2) NOT NULL,
+    cost DECIMAL(14,2) NOT NULL,
+    PRIMARY KEY (company_id, period, product_id, gst_percent)
+);
+
+-- end-of-day job queue (see jobs.py)
+CREATE TABLE IF NOT EXISTS jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    company_id INT NOT NULL,
+    kind VARCHAR(30) NOT NULL,
+    params TEXT NOT NULL,
+    status ENUM('queued', 'running', 'done', 'failed') NOT NULL,
+    progress INT NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at DATETIME NOT NULL,
+    started_at DATETIME,
+    finished_at DATETIME,
+    KEY idx_jobs_status (status, id)
+);
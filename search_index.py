@@ -0,0 +1,291 @@
+import bisect
+import heapq
+import re
+import threading
+import time
+
+# -------------------------------------------------
+# IN-MEMORY PRODUCT SEARCH INDEX
+# -------------------------------------------------
+# Replaces "part_no LIKE '%q%' OR part_name LIKE '%q%'", which makes MySQL
+# scan the whole products table on every keystroke.
+#
+# Results are ranked in tiers, best first, and a tier is only looked at
+# when the ones above it did not fill `limit`:
+#
+#   0. exact part_no / barcode            (dict)
+#   1. part_no starts with q              (sorted part_no list)
+#   2. part_name starts with q            (sorted name list)
+#   3. a word of part_name starts with q  (sorted word list)
+#   4. q anywhere in part_no / barcode / part_name, 3+ chars only
+#                                         (trigram postings, verified)
+#
+# Inside a tier products are ordered by part_name.
+#
+# The index is process-local. Every worker loads its own copy and reloads
+# it after `ttl` seconds so writes made by other workers show up. A reload
+# is single-flight (see refresh) and builds the new structures outside the
+# lock, so searches keep answering from the old data while it runs.
+# Writes that land during a reload may be missing from the rows it
+# fetched: upserts and removes are replayed onto the new structures, and
+# any write marks the index stale so the next request reloads again.
+
+GRAM = 3
+FIELDS = ('id', 'part_no', 'barcode', 'part_name', 'sell_price', 'stock_qty')
+WORD_SPLIT = re.compile(r'[^0-9a-z]+')
+HIGH = '\uffff'
+
+
+def _norm(value):
+    return (value or '').strip().lower()
+
+
+def _grams(text):
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+def _prefix_range(entries, q):
+    lo = bisect.bisect_left(entries, (q,))
+    hi = bisect.bisect_left(entries, (q + HIGH,))
+    return entries[lo:hi]
+
+
+def _delete(entries, entry):
+    i = bisect.bisect_left(entries, entry)
+    if i < len(entries) and entries[i] == entry:
+        del entries[i]
+
+
+class ProductSearchIndex:
+
+    STATE = ('_products', '_keys', '_text', '_grams', '_part_nos', '_barcodes',
+             '_by_part_no', '_by_name', '_words')
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self.loaded_at = None
+        self._dirty = False
+        self._loading = False
+        self._journal = []      # (method, arg) written while a reload runs
+        self._loaded = threading.Event()
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._products = {}     # id -> product dict (public fields)
+        self._keys = {}         # id -> (part_name, id) sort key
+        self._text = {}         # id -> "part_no|barcode|part_name" for substring checks
+        self._grams = {}        # trigram -> set(ids)
+        self._part_nos = {}     # part_no -> id
+        self._barcodes = {}     # barcode -> id
+        self._by_part_no = []   # sorted [(part_no, id)]
+        self._by_name = []      # sorted [(part_name, id)]
+        self._words = []        # sorted [(word, id)]
+
+    # ---------------- loading ----------------
+    def stale(self):
+        if self.loaded_at is None or self._dirty:
+            return True
+        return self.ttl is not None and time.time() - self.loaded_at > self.ttl
+
+    def refresh(self, fetch):
+        # Reloads from fetch() -> rows if the index is stale. One caller at
+        # a time does the reload; the others go on with the current data,
+        # or, before the first load, wait for it.
+        while True:
+            with self._lock:
+                if not self.stale():
+                    return
+                claimed = not self._loading
+                if claimed:
+                    self._loading = True
+                    self._dirty = False     # an invalidate() from here on counts
+                    self._journal = []
+                elif self.loaded_at is not None:
+                    return
+            if claimed:
+                try:
+                    self.load(fetch())
+                finally:
+                    with self._lock:
+                        self._loading = False
+                        self._journal = []
+                return
+            self._loaded.wait(1)    # retried if that first load failed
+
+    def load(self, rows):
+        # rows are (id, part_no, barcode, part_name, sell_price, stock_qty)
+        fresh = ProductSearchIndex()
+        for row in rows:
+            fresh._add(dict(zip(FIELDS, row)), bulk=True)
+        fresh._by_part_no.sort()
+        fresh._by_name.sort()
+        fresh._words.sort()
+        with self._lock:
+            for method, arg in self._journal:
+                getattr(fresh, method)(arg)
+            self._journal = []
+            for name in self.STATE:
+                setattr(self, name, getattr(fresh, name))
+            self.loaded_at = time.time()
+        self._loaded.set()
+
+    def invalidate(self):
+        # next stale() check reloads from the database; the current data
+        # is served until then
+        self._dirty = True
+
+    def __len__(self):
+        return len(self._products)
+
+    # ---------------- writes ----------------
+    def _written(self, method=None, arg=None):
+        # caller holds the lock
+        if self._loading:
+            self._dirty = True
+            if method:
+                self._journal.append((method, arg))
+
+    def upsert(self, product):
+        with self._lock:
+            self._written('upsert', dict(product))
+            old = self._products.get(int(product['id']))
+            if old:
+                self._remove(old)
+                product = dict(old, **product)
+            self._add(dict(product))
+
+    def remove(self, product_id):
+        with self._lock:
+            self._written('remove', product_id)
+            old = self._products.get(int(product_id))
+            if old:
+                self._remove(old)
+
+    def adjust_stock(self, product_id, delta):
+        # not replayed (the fetched rows may already include it); the
+        # reload that follows picks it up
+        with self._lock:
+            self._written()
+            p = self._products.get(int(product_id))
+            if p:
+                p['stock_qty'] += delta
+
+    @staticmethod
+    def _entries(p):
+        pid = p['id']
+        part_no = _norm(p['part_no'])
+        barcode = _norm(p['barcode'])
+        name = _norm(p['part_name'])
+        words = {w for w in WORD_SPLIT.split(name) if w}
+        grams = _grams(part_no) | _grams(barcode) | _grams(name)
+        return pid, part_no, barcode, name, words, grams
+
+    def _add(self, p, bulk=False):
+        p['id'] = int(p['id'])
+        p['sell_price'] = float(p['sell_price'] or 0)
+        p['stock_qty'] = int(p['stock_qty'] or 0)
+        pid, part_no, barcode, name, words, grams = self._entries(p)
+
+        self._products[pid] = {f: p[f] for f in FIELDS}
+        self._keys[pid] = (name, pid)
+        self._text[pid] = f"{part_no}|{barcode}|{name}"
+        for g in grams:
+            self._grams.setdefault(g, set()).add(pid)
+        if part_no:
+            self._part_nos[part_no] = pid
+        if barcode:
+            self._barcodes[barcode] = pid
+
+        add = list.append if bulk else bisect.insort
+        add(self._by_part_no, (part_no, pid))
+        add(self._by_name, (name, pid))
+        for w in words:
+            add(self._words, (w, pid))
+
+    def _remove(self, p):
+        pid, part_no, barcode, name, words, grams = self._entries(p)
+
+        del self._products[pid]
+        del self._keys[pid]
+        del self._text[pid]
+        for g in grams:
+            ids = self._grams.get(g)
+            if ids is not None:
+                ids.discard(pid)
+                if not ids:
+                    del self._grams[g]
+        if self._part_nos.get(part_no) == pid:
+            del self._part_nos[part_no]
+        if self._barcodes.get(barcode) == pid:
+            del self._barcodes[barcode]
+
+        _delete(self._by_part_no, (part_no, pid))
+        _delete(self._by_name, (name, pid))
+        for w in words:
+            _delete(self._words, (w, pid))
+
+    # ---------------- reads ----------------
+    def get(self, product_id):
+        with self._lock:
+            p = self._products.get(int(product_id))
+            return dict(p) if p else None
+
+    def lookup(self, code):
+        code = _norm(code)
+        with self._lock:
+            pid = self._part_nos.get(code)
+            if pid is None:
+                pid = self._barcodes.get(code)
+            return dict(self._products[pid]) if pid is not None else None
+
+    def search(self, q, limit=10):
+        q = _norm(q)
+        if not q:
+            return []
+
+        with self._lock:
+            found = []
+            seen = set()
+
+            def take(ids):
+                for pid in ids:
+                    if pid not in seen:
+                        seen.add(pid)
+                        found.append(pid)
+                        if len(found) == limit:
+                            return True
+                return False
+
+            def best(ids):
+                # top of a tier by part_name; over-fetch by len(seen) so
+                # dropping products from earlier tiers can't starve it
+                return heapq.nsmallest(limit + len(seen), ids, key=self._keys.__getitem__)
+
+            done = (
+                take(i for i in (self._part_nos.get(q), self._barcodes.get(q)) if i is not None)
+                or take(best(pid for _, pid in _prefix_range(self._by_part_no, q)))
+                or take(pid for _, pid in _prefix_range(self._by_name, q))
+                or take(best({pid for _, pid in _prefix_range(self._words, q)}))
+            )
+            if not done and len(q) >= GRAM:
+                take(best(self._substring_matches(q)))
+
+            return [dict(self._products[pid]) for pid in found]
+
+    def _substring_matches(self, q):
+        postings = []
+        for g in _grams(q):
+            ids = self._grams.get(g)
+            if not ids:
+                return set()
+            postings.append(ids)
+        postings.sort(key=len)
+
+        ids = postings[0]
+        for other in postings[1:]:
+            ids = ids & other
+            if not ids:
+                return ids
+
+        return {i for i in ids if q in self._text[i]}
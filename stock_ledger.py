@@ -0,0 +1,164 @@
+from collections import OrderedDict
+from datetime import datetime
+
+# -------------------------------------------------
+# STOCK LEDGER
+# -------------------------------------------------
+# Every stock change is appended to stock_movements (SALE, PURCHASE,
+# ADJUST) and folded into stock_summary in the same transaction, so the
+# summary page reads one row per product and never sums the ledger.
+#
+# stock_summary keeps running totals only (stock, purchased qty and
+# value), which makes it exactly rebuildable from the ledger: see
+# rebuild_summary().
+
+SALE = 'SALE'
+PURCHASE = 'PURCHASE'
+ADJUST = 'ADJUST'
+
+
+def _placeholders(n):
+    return ",".join(["%s"] * n)
+
+
+def apply_movements(cur, movement_type, changes, ref, created_at=None):
+    # changes: {product_id: (qty_change, unit_cost or None)}
+    # Three statements whatever the number of products: stock update,
+    # ledger insert, summary upsert. The caller commits.
+    if not changes:
+        return
+    created_at = created_at or datetime.now()
+    ids = list(changes)
+
+    cases = " ".join(["WHEN %s THEN %s"] * len(ids))
+    params = [v for pid in ids for v in (pid, changes[pid][0])]
+    cur.execute(f"""
+        UPDATE products
+        SET stock_qty = stock_qty + CASE id {cases} END
+        WHERE id IN ({_placeholders(len(ids))})
+    """, params + ids)
+
+    cur.executemany("""
+        INSERT INTO stock_movements
+        (product_id, movement_type, qty_change, unit_cost, ref, created_at)
+        VALUES (%s,%s,%s,%s,%s,%s)
+    """, [(pid, movement_type, qty, cost, ref, created_at)
+          for pid, (qty, cost) in changes.items()])
+
+    cur.executemany("""
+        INSERT INTO stock_summary
+        (product_id, stock_qty, purchased_qty, purchased_value, updated_at)
+        VALUES (%s,%s,%s,%s,%s)
+        ON DUPLICATE KEY UPDATE
+            stock_qty = stock_qty + VALUES(stock_qty),
+            purchased_qty = purchased_qty + VALUES(purchased_qty),
+            purchased_value = purchased_value + VALUES(purchased_value),
+            updated_at = VALUES(updated_at)
+    """, [
+        (pid, qty,
+         qty if movement_type == PURCHASE else 0,
+         qty * cost if movement_type == PURCHASE else 0,
+         created_at)
+        for pid, (qty, cost) in changes.items()
+    ])
+
+
+# -------------------------------------------------
+# PURCHASE ENTRY
+# -------------------------------------------------
+def save_purchase(conn, company_id, supplier, bill_no, items, created_at=None):
+    # items: [{"product_id", "qty", "rate"}]; raises ValueError for a
+    # qty below 1 or a negative rate (they would skew the average cost)
+    created_at = created_at or datetime.now()
+
+    changes = OrderedDict()
+    for i in items:
+        pid, qty, rate = int(i['product_id']), int(i['qty']), float(i['rate'])
+        if qty < 1 or not 0 <= rate < float('inf'):
+            raise ValueError(f"bad qty/rate for product #{pid}")
+        old_qty, old_rate = changes.get(pid, (0, 0))
+        # same product twice on one bill: keep the weighted rate
+        changes[pid] = (old_qty + qty, (old_qty * old_rate + qty * rate) / (old_qty + qty))
+
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            INSERT INTO purchases (company_id, supplier, bill_no, total_amount, created_at)
+            VALUES (%s,%s,%s,%s,%s)
+        """, (company_id, supplier, bill_no,
+              sum(int(i['qty']) * float(i['rate']) for i in items), created_at))
+        purchase_id = cur.lastrowid
+
+        cur.executemany("""
+            INSERT INTO purchase_items (purchase_id, product_id, quantity, rate)
+            VALUES (%s,%s,%s,%s)
+        """, [(purchase_id, i['product_id'], i['qty'], i['rate']) for i in items])
+
+        apply_movements(cur, PURCHASE, changes, f"PUR-{purchase_id}", created_at)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+    return purchase_id
+
+
+# -------------------------------------------------
+# SUMMARY READS / REBUILD
+# -------------------------------------------------
+def stock_summary(cur, company_id):
+    # one row per product: (part_no, part_name, stock_qty, min_stock, avg_cost)
+    cur.execute("""
+        SELECT p.part_no, p.part_name,
+               COALESCE(s.stock_qty, 0), p.min_stock,
+               s.purchased_value / NULLIF(s.purchased_qty, 0)
+        FROM products p
+        LEFT JOIN stock_summary s ON s.product_id = p.id
+        WHERE p.company_id = %s
+        ORDER BY p.part_name, p.id
+    """, (company_id,))
+    return cur.fetchall()
+
+
+def rebuild_summary(conn, batch=500000, progress=None):
+    # Recompute stock_summary from the ledger into a staging table, one
+    # id range per statement, then swap it in atomically. Run it when no
+    # bills are being saved: movements written during the rebuild are
+    # only picked up by the next one.
+    cur = conn.cursor()
+    cur.execute("DROP TABLE IF EXISTS stock_summary_rebuild")
+    cur.execute("CREATE TABLE stock_summary_rebuild LIKE stock_summary")
+    cur.execute("SELECT COALESCE(MAX(id), 0) FROM stock_movements")
+    max_id = cur.fetchone()[0]
+
+    for lo in range(0, max_id, batch):
+        cur.execute("""
+            INSERT INTO stock_summary_rebuild
+            (product_id, stock_qty, purchased_qty, purchased_value, updated_at)
+            SELECT product_id,
+                   SUM(qty_change),
+                   SUM(IF(movement_type = 'PURCHASE', qty_change, 0)),
+                   SUM(IF(movement_type = 'PURCHASE', qty_change * unit_cost, 0)),
+                   MAX(created_at)
+            FROM stock_movements
+            WHERE id > %s AND id <= %s
+            GROUP BY product_id
+            ON DUPLICATE KEY UPDATE
+                stock_qty = stock_qty + VALUES(stock_qty),
+                purchased_qty = purchased_qty + VALUES(purchased_qty),
+                purchased_value = purchased_value + VALUES(purchased_value),
+                updated_at = GREATEST(updated_at, VALUES(updated_at))
+        """, (lo, lo + batch))
+        conn.commit()
+        if progress:
+            progress(min(lo + batch, max_id), max_id)
+
+    cur.execute("""
+        RENAME TABLE stock_summary TO stock_summary_old,
+                     stock_summary_rebuild TO stock_summary
+    """)
+    cur.execute("DROP TABLE stock_summary_old")
+    cur.close()
+    return max_id